@@ -6,58 +6,33 @@ Returns: HTTP response with JWT token or error message
 
 import json
 import os
-import hashlib
-import hmac
-import base64
-from datetime import datetime, timedelta
+import sys
 from typing import Dict, Any, Optional
-import psycopg2
 from psycopg2.extras import RealDictCursor
 
-def get_db_connection():
-    return psycopg2.connect(os.environ['DATABASE_URL'])
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.auth import create_jwt, get_cached_user, verify_jwt
+from shared.db import get_db_connection, release_db_connection
+from shared.http import compressed
+from shared.passwords import PasswordHasherBusy, hash_password, needs_rehash, verify_dummy_password, verify_password
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def create_jwt(user_id: int, email: str) -> str:
-    secret = os.environ.get('JWT_SECRET', 'default-secret-key-change-in-production')
-    exp = int((datetime.utcnow() + timedelta(days=7)).timestamp())
-    
-    header = base64.urlsafe_b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}).encode()).decode().rstrip('=')
-    payload = base64.urlsafe_b64encode(json.dumps({"user_id": user_id, "email": email, "exp": exp}).encode()).decode().rstrip('=')
-    
-    signature = base64.urlsafe_b64encode(
-        hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
-    ).decode().rstrip('=')
-    
-    return f"{header}.{payload}.{signature}"
-
-def verify_jwt(token: str) -> Optional[Dict[str, Any]]:
+def run_query(query: str, params: tuple) -> Optional[Dict[str, Any]]:
+    '''
+    Runs one statement on a pooled connection and commits it. The connection
+    goes back to the pool before any password hashing, which can wait up to
+    PASSWORD_HASH_TIMEOUT for the hash pool.
+    '''
+    conn = get_db_connection()
     try:
-        secret = os.environ.get('JWT_SECRET', 'default-secret-key-change-in-production')
-        parts = token.split('.')
-        if len(parts) != 3:
-            return None
-        
-        header, payload, signature = parts
-        
-        expected_signature = base64.urlsafe_b64encode(
-            hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
-        ).decode().rstrip('=')
-        
-        if signature != expected_signature:
-            return None
-        
-        payload_data = json.loads(base64.urlsafe_b64decode(payload + '=='))
-        
-        if payload_data['exp'] < int(datetime.utcnow().timestamp()):
-            return None
-        
-        return payload_data
-    except Exception:
-        return None
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, params)
+            row = cur.fetchone() if cur.description else None
+        conn.commit()
+        return row
+    finally:
+        release_db_connection(conn)
 
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
@@ -78,9 +53,6 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         body_data = json.loads(event.get('body', '{}'))
         action = body_data.get('action')
         
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
         try:
             if action == 'register':
                 email = body_data.get('email')
@@ -95,22 +67,25 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'isBase64Encoded': False
                     }
                 
-                cur.execute("SELECT id FROM users WHERE email = %s", (email,))
-                if cur.fetchone():
-                    return {
-                        'statusCode': 409,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'User already exists'}),
-                        'isBase64Encoded': False
-                    }
+                user_exists = {
+                    'statusCode': 409,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'User already exists'}),
+                    'isBase64Encoded': False
+                }
+                
+                if run_query("SELECT id FROM users WHERE email = %s", (email,)):
+                    return user_exists
                 
                 password_hash = hash_password(password)
-                cur.execute(
-                    "INSERT INTO users (email, password_hash, name) VALUES (%s, %s, %s) RETURNING id, email, name",
+                # a concurrent registration may have taken the email while the password was hashed
+                user = run_query(
+                    "INSERT INTO users (email, password_hash, name) VALUES (%s, %s, %s) "
+                    "ON CONFLICT (email) DO NOTHING RETURNING id, email, name",
                     (email, password_hash, name)
                 )
-                user = cur.fetchone()
-                conn.commit()
+                if not user:
+                    return user_exists
                 
                 token = create_jwt(user['id'], user['email'])
                 
@@ -136,14 +111,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'isBase64Encoded': False
                     }
                 
-                password_hash = hash_password(password)
-                cur.execute(
-                    "SELECT id, email, name FROM users WHERE email = %s AND password_hash = %s",
-                    (email, password_hash)
-                )
-                user = cur.fetchone()
+                user = run_query("SELECT id, email, name, password_hash FROM users WHERE email = %s", (email,))
                 
                 if not user:
+                    # hash anyway so the response time does not tell whether the email is registered
+                    verify_dummy_password(password)
+                
+                if not user or not verify_password(password, user['password_hash']):
                     return {
                         'statusCode': 401,
                         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -151,6 +125,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'isBase64Encoded': False
                     }
                 
+                if needs_rehash(user['password_hash']):
+                    # best effort: the login has succeeded, a busy hash pool only postpones the upgrade
+                    try:
+                        run_query("UPDATE users SET password_hash = %s WHERE id = %s", (hash_password(password), user['id']))
+                    except PasswordHasherBusy:
+                        pass
+                
                 token = create_jwt(user['id'], user['email'])
                 
                 return {
@@ -184,8 +165,12 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'isBase64Encoded': False
                     }
                 
-                cur.execute("SELECT id, email, name FROM users WHERE id = %s", (payload['user_id'],))
-                user = cur.fetchone()
+                conn = get_db_connection()
+                try:
+                    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                        user = get_cached_user(cur, payload['user_id'])
+                finally:
+                    release_db_connection(conn)
                 
                 if not user:
                     return {
@@ -212,9 +197,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
         
-        finally:
-            cur.close()
-            conn.close()
+        except PasswordHasherBusy:
+            return {
+                'statusCode': 503,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Retry-After': '1'},
+                'body': json.dumps({'error': 'Server is busy, please retry'}),
+                'isBase64Encoded': False
+            }
     
     return {
         'statusCode': 405,
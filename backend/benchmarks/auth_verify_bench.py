@@ -0,0 +1,54 @@
+'''
+Per-request token verification cost: the previous inline verify_jwt
+(environment lookup, HMAC, base64 and JSON on every call) versus the shared
+verifier with its verified-token cache. Needs no database.
+Usage: python backend/benchmarks/auth_verify_bench.py [iterations]
+'''
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sys
+from datetime import datetime
+
+from bench_utils import BACKEND_DIR, measure, report
+
+sys.path.append(BACKEND_DIR)
+from shared import auth
+
+def legacy_verify_jwt(token: str):
+    try:
+        secret = os.environ.get('JWT_SECRET', 'default-secret-key-change-in-production')
+        parts = token.split('.')
+        if len(parts) != 3:
+            return None
+        header, payload, signature = parts
+        expected_signature = base64.urlsafe_b64encode(
+            hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        ).decode().rstrip('=')
+        if signature != expected_signature:
+            return None
+        payload_data = json.loads(base64.urlsafe_b64decode(payload + '=='))
+        if payload_data['exp'] < int(datetime.utcnow().timestamp()):
+            return None
+        return payload_data
+    except Exception:
+        return None
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    token = auth.create_jwt(1, 'bench@example.com')
+    headers = {'X-Auth-Token': token}
+    
+    def uncached() -> None:
+        auth._verified_tokens.clear()
+        auth.get_user_from_token(headers)
+    
+    report('legacy inline verify_jwt', measure(lambda: legacy_verify_jwt(token), iterations))
+    report('shared verify, cache miss', measure(uncached, iterations))
+    report('shared verify, cache hit', measure(lambda: auth.get_user_from_token(headers), iterations))
+
+if __name__ == '__main__':
+    main()
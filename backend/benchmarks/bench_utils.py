@@ -0,0 +1,46 @@
+'''
+Helpers shared by the backend benchmarks: loading a cloud function module
+from its directory and summarising latency samples.
+Benchmarks talk to the database from DATABASE_URL (a local Postgres with
+db_migrations applied), never to the deployed functions.
+'''
+
+import importlib.util
+import os
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# benchmarks measure the handlers, not the anonymous response cache in front of them
+os.environ.setdefault('RESPONSE_CACHE_SIZE', '0')
+
+def load_function(name: str, module: str = 'index') -> Any:
+    path = os.path.join(BACKEND_DIR, name, f'{module}.py')
+    spec = importlib.util.spec_from_file_location(f'{name.replace("-", "_")}_{module}', path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 5) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        'mean_ms': statistics.fmean(ordered),
+        'p50_ms': ordered[len(ordered) // 2],
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+def report(label: str, samples: List[float]) -> None:
+    stats = summarize(samples)
+    print(f"{label:<32} mean {stats['mean_ms']:8.3f} ms   p50 {stats['p50_ms']:8.3f} ms   p99 {stats['p99_ms']:8.3f} ms")
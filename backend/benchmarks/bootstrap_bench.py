@@ -0,0 +1,42 @@
+'''
+Time to the first full page of data: the four requests the frontend makes on
+load (auth verify, recipe list, ingredient list, meal plans) run one after
+another, versus the local server's bootstrap route running them concurrently
+on pooled connections. Needs a user to sign the token for (BENCH_USER_ID, default 1).
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/bootstrap_bench.py [iterations]
+'''
+
+import json
+import os
+import sys
+
+from bench_utils import BACKEND_DIR, load_function, measure, report
+
+sys.path.append(BACKEND_DIR)
+from shared.auth import create_jwt
+from shared.bootstrap import handler as bootstrap_handler
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    token = create_jwt(int(os.environ.get('BENCH_USER_ID', '1')), 'bench@example.com')
+    headers = {'X-Auth-Token': token}
+    
+    auth = load_function('auth')
+    recipes = load_function('recipes')
+    ingredients = load_function('ingredients')
+    meal_planner = load_function('meal-planner')
+    
+    def sequential() -> None:
+        auth.handler({'httpMethod': 'POST', 'headers': {}, 'body': json.dumps({'action': 'verify', 'token': token})}, None)
+        recipes.handler({'httpMethod': 'GET', 'headers': headers, 'queryStringParameters': {}}, None)
+        ingredients.handler({'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {}}, None)
+        meal_planner.handler({'httpMethod': 'GET', 'headers': headers, 'queryStringParameters': {}}, None)
+    
+    def combined() -> None:
+        bootstrap_handler({'httpMethod': 'GET', 'headers': headers, 'queryStringParameters': {}}, None)
+    
+    report('4 requests, one after another', measure(sequential, iterations))
+    report('bootstrap (concurrent sections)', measure(combined, iterations))
+
+if __name__ == '__main__':
+    main()
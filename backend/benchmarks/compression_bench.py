@@ -0,0 +1,45 @@
+'''
+Response size and encoding latency for synthetic recipe lists of different
+sizes: identity vs gzip vs brotli (when the brotli package is installed).
+Needs no database.
+Usage: python backend/benchmarks/compression_bench.py [iterations]
+'''
+
+import json
+import sys
+
+from bench_utils import BACKEND_DIR, measure, summarize
+
+sys.path.append(BACKEND_DIR)
+from shared import http
+
+PAYLOAD_SIZES = (1, 10, 100, 1000)
+
+def recipe(i: int) -> dict:
+    return {
+        'id': i, 'user_id': None, 'title': f'Рецепт номер {i}',
+        'description': 'Нежный и воздушный омлет на завтрак ' * 3,
+        'image_url': f'https://images.unsplash.com/photo-{1600000000000 + i}?w=800',
+        'cooking_time': 15 + i % 60, 'servings': 2 + i % 6, 'difficulty': ('easy', 'medium', 'hard')[i % 3],
+        'category_id': 1 + i % 8, 'instructions': '1. Взбить яйца с молоком\n2. Посолить и поперчить\n' * 6,
+        'created_at': '2026-10-01 12:00:00', 'updated_at': '2026-10-01 12:00:00', 'author_name': 'Автор',
+    }
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    encodings = ['identity', 'gzip'] + (['br'] if http.brotli is not None else [])
+    print(f"{'rows':>6} {'encoding':<9} {'wire bytes':>11} {'ratio':>6} {'encode p50 ms':>14}")
+    
+    for rows in PAYLOAD_SIZES:
+        body = json.dumps([recipe(i) for i in range(rows)], default=str)
+        raw_size = len(body.encode())
+        for encoding in encodings:
+            event = {'headers': {'Accept-Encoding': encoding}}
+            response = {'statusCode': 200, 'headers': {}, 'body': body, 'isBase64Encoded': False}
+            result = http.compress_response(event, response)
+            wire = len(result['body']) if not result['isBase64Encoded'] else len(result['body']) * 3 // 4
+            stats = summarize(measure(lambda: http.compress_response(event, response), iterations))
+            print(f"{rows:>6} {result['headers'].get('Content-Encoding', 'identity'):<9} {wire:>11} {raw_size / wire:>6.1f} {stats['p50_ms']:>14.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+'''
+Per-request latency of a connect-per-request handler versus the pooled
+connection used by the functions.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/db_pool_bench.py [iterations]
+'''
+
+import os
+import sys
+
+import psycopg2
+
+from bench_utils import load_function, measure, report
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    dsn = os.environ['DATABASE_URL']
+    recipes = load_function('recipes')
+    
+    def unpooled_request() -> None:
+        conn = psycopg2.connect(dsn)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, title FROM recipes ORDER BY id LIMIT 20")
+                cur.fetchall()
+        finally:
+            conn.close()
+    
+    def pooled_request() -> None:
+        conn = recipes.get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, title FROM recipes ORDER BY id LIMIT 20")
+                cur.fetchall()
+        finally:
+            recipes.release_db_connection(conn)
+    
+    def handler_request() -> None:
+        recipes.handler({'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {}}, None)
+    
+    report('connect per request', measure(unpooled_request, iterations))
+    report('pooled connection', measure(pooled_request, iterations))
+    report('recipes handler GET (pooled)', measure(handler_request, iterations))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+'''
+Peak Python memory of the recipe export: fetchall() + dicts + json.dumps
+versus the streaming server-side cursor used for format=json/ndjson,
+which returns EXPORT_MAX_ROWS rows per response and is followed here page
+by page through X-Next-Cursor. Seeds a large batch of synthetic recipes,
+measures, then removes them.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/export_memory_bench.py [rows]
+'''
+
+import json
+import sys
+import time
+import tracemalloc
+
+from psycopg2.extras import RealDictCursor
+
+from bench_utils import load_function
+
+SEED_PREFIX = 'bench-export-'
+
+def seed(conn, rows: int) -> None:
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO recipes (title, description, image_url, cooking_time, servings, difficulty, instructions)
+            SELECT %s || g, repeat('описание ', 20), '', 30, 2, 'easy', repeat('шаг приготовления ', 60)
+            FROM generate_series(1, %s) AS g
+        """, (SEED_PREFIX, rows))
+    conn.commit()
+
+def cleanup(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM recipes WHERE title LIKE %s", (SEED_PREFIX + '%',))
+    conn.commit()
+
+def fetchall_export(conn) -> str:
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT r.id, r.user_id, r.title, r.description, r.image_url,
+                   r.cooking_time, r.servings, r.difficulty, r.category_id,
+                   r.instructions, r.created_at, r.updated_at,
+                   u.name as author_name
+            FROM recipes r
+            LEFT JOIN users u ON r.user_id = u.id
+            ORDER BY r.created_at DESC, r.id DESC
+        """)
+        recipes = cur.fetchall()
+        body = json.dumps([dict(r) for r in recipes], default=str)
+    conn.rollback()
+    return len(body)
+
+def paged_export(recipes, export_format: str) -> int:
+    size = 0
+    params = {'format': export_format}
+    while True:
+        response = recipes.handler({'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': params}, None)
+        size += len(response['body'])
+        next_cursor = response['headers'].get('X-Next-Cursor')
+        if not next_cursor:
+            return size
+        params = {'format': export_format, 'cursor': next_cursor}
+
+def profile(label: str, fn) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} peak {peak / 1024 / 1024:8.1f} MiB   body {size / 1024 / 1024:8.1f} MiB   {elapsed:6.2f} s")
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    recipes = load_function('recipes')
+    conn = recipes.get_db_connection()
+    try:
+        seed(conn, rows)
+        profile('fetchall + json.dumps', lambda: fetchall_export(conn))
+        for export_format in ('json', 'ndjson'):
+            profile(f'paged {export_format}', lambda: paged_export(recipes, export_format))
+    finally:
+        cleanup(conn)
+        recipes.release_db_connection(conn)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+'''
+Ingredient autocomplete on synthetic names: the in-process prefix index
+(shared.autocomplete) versus what `name ILIKE '%x%' ORDER BY name` has to
+do, i.e. test every name and sort the matches. Needs no database.
+Usage: python backend/benchmarks/ingredient_autocomplete_bench.py [ingredients] [iterations]
+'''
+
+import random
+import sys
+import time
+
+from bench_utils import BACKEND_DIR, measure, report
+
+sys.path.append(BACKEND_DIR)
+from shared.autocomplete import NameIndex, normalize_name
+
+SYLLABLES = ['ка', 'ро', 'мо', 'ло', 'ко', 'пе', 'ре', 'ц', 'св', 'ёк', 'ла', 'ту', 'ш', 'ны', 'ми', 'да']
+QUALIFIERS = ['свежий', 'сушёный', 'молотый', 'копчёный', 'красный', 'зелёный', 'Ёлочный']
+LIMIT = 10
+
+def synthetic_names(count: int, rng: random.Random):
+    names = set()
+    while len(names) < count:
+        word = ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+        names.add(f'{word} {rng.choice(QUALIFIERS)}' if rng.random() < 0.4 else word)
+    return [{'id': i, 'name': name, 'unit': 'г', 'calories_per_100g': 100} for i, name in enumerate(sorted(names), 1)]
+
+def scan_complete(rows, prefix, limit):
+    fragment = normalize_name(prefix)
+    matches = [row for row in rows if fragment in normalize_name(row['name'])]
+    matches.sort(key=lambda row: (row['name'], row['id']))
+    return matches[:limit]
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(42)
+    rows = synthetic_names(count, rng)
+    
+    started = time.perf_counter()
+    index = NameIndex(rows)
+    print(f"{count} ingredients, index built in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    # what the picker sends while a name is being typed
+    prefixes = [row['name'][:length] for row in rng.sample(rows, 20) for length in (1, 2, 3, 5)]
+    for prefix in prefixes:
+        fragment = normalize_name(prefix)
+        assert all(fragment in normalize_name(row['name']) for row in index.complete(prefix, LIMIT))
+    
+    cycle = iter(prefixes * (iterations + 10))
+    report('scan and sort every name', measure(lambda: scan_complete(rows, next(cycle), LIMIT), iterations))
+    cycle = iter(prefixes * (iterations + 10))
+    report('prefix index', measure(lambda: index.complete(next(cycle), LIMIT), iterations))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+'''
+Bytes per response and rows per second of the recipe list with the full
+column set versus the default summary projection (no description,
+instructions or author join). Compression is disabled to compare raw bytes.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/list_fields_bench.py [iterations]
+'''
+
+import sys
+import time
+
+from bench_utils import load_function, measure, report
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    recipes = load_function('recipes')
+    
+    for fields in ('full', 'summary'):
+        page = {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {'fields': fields, 'limit': '100'}}
+        export = {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {'fields': fields, 'format': 'ndjson'}}
+        
+        body = recipes.handler(page, None)['body']
+        print(f"fields={fields:<8} page of 100: {len(body.encode())} bytes")
+        report(f'page of 100, fields={fields}', measure(lambda: recipes.handler(page, None), iterations))
+        
+        started = time.perf_counter()
+        rows = recipes.handler(export, None)['body'].count('\n')
+        elapsed = time.perf_counter() - started
+        print(f"fields={fields:<8} full export: {rows} rows, {rows / elapsed:,.0f} rows/s")
+
+if __name__ == '__main__':
+    main()
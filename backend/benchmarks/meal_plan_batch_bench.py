@@ -0,0 +1,59 @@
+'''
+Filling a week of breakfast/lunch/dinner: 21 single-slot POSTs versus one
+batch POST to the meal-planner handler.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/meal_plan_batch_bench.py [iterations]
+'''
+
+import json
+import sys
+from datetime import date, timedelta
+
+from bench_utils import load_function, measure, report
+
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner')
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    planner = load_function('meal-planner')
+    auth = load_function('auth')
+    
+    conn = planner.get_db_connection()
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO users (email, password_hash, name) VALUES ('bench-planner@example.com', '-', 'bench')
+            ON CONFLICT (email) DO UPDATE SET name = EXCLUDED.name RETURNING id
+        """)
+        user_id = cur.fetchone()[0]
+        cur.execute("SELECT id FROM recipes ORDER BY id LIMIT 1")
+        recipe_id = cur.fetchone()[0]
+    conn.commit()
+    planner.release_db_connection(conn)
+    
+    headers = {'X-Auth-Token': auth.create_jwt(user_id, 'bench-planner@example.com')}
+    start = date(2030, 1, 7)
+    slots = [
+        {'recipe_id': recipe_id, 'meal_date': (start + timedelta(days=day)).isoformat(), 'meal_type': meal_type}
+        for day in range(7) for meal_type in MEAL_TYPES
+    ]
+    
+    def per_slot() -> None:
+        for slot in slots:
+            planner.handler({'httpMethod': 'POST', 'headers': headers, 'body': json.dumps(slot)}, None)
+    
+    def batch() -> None:
+        body = json.dumps({'action': 'batch', 'upsert': slots})
+        planner.handler({'httpMethod': 'POST', 'headers': headers, 'body': body}, None)
+    
+    try:
+        report('21 single-slot requests', measure(per_slot, iterations, warmup=2))
+        report('one batch request', measure(batch, iterations, warmup=2))
+    finally:
+        conn = planner.get_db_connection()
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM meal_plans WHERE user_id = %s", (user_id,))
+            cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        conn.commit()
+        planner.release_db_connection(conn)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+'''
+"What can I cook" matching on synthetic data: the inverted pantry index
+versus scanning every recipe's ingredient set (what a per-request join over
+recipe_ingredients has to do). Needs no database.
+Usage: python backend/benchmarks/pantry_match_bench.py [recipes] [iterations]
+'''
+
+import random
+import sys
+import time
+from collections import defaultdict
+
+from bench_utils import BACKEND_DIR, measure, report
+
+sys.path.append(BACKEND_DIR)
+from shared.pantry import PantryIndex
+
+INGREDIENTS = 2000
+PANTRY_SIZE = 25
+MAX_MISSING = 2
+LIMIT = 20
+
+def synthetic_recipes(count: int, rng: random.Random):
+    # a few staples (salt, oil, onion...) occur everywhere, the long tail rarely
+    weights = [1 / (rank + 1) for rank in range(INGREDIENTS)]
+    population = list(range(1, INGREDIENTS + 1))
+    return {recipe_id: set(rng.choices(population, weights, k=rng.randint(4, 14))) for recipe_id in range(1, count + 1)}
+
+def scan_match(recipes, pantry, max_missing, limit):
+    scored = []
+    for recipe_id, ingredients in recipes.items():
+        matched = len(ingredients & pantry)
+        missing = len(ingredients) - matched
+        if matched and missing <= max_missing:
+            scored.append((missing, -matched, recipe_id))
+    scored.sort()
+    return [(recipe_id, -matched, missing) for missing, matched, recipe_id in scored[:limit]]
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = random.Random(42)
+    recipes = synthetic_recipes(count, rng)
+    
+    postings = defaultdict(list)
+    for recipe_id, ingredients in recipes.items():
+        for ingredient_id in ingredients:
+            postings[ingredient_id].append(recipe_id)
+    
+    started = time.perf_counter()
+    index = PantryIndex.from_rows(postings.items())
+    dense = [p for p in index.postings.values() if isinstance(p, int)]
+    size = sum(p.bit_length() // 8 for p in dense) + sum(p.itemsize * len(p) for p in index.postings.values() if not isinstance(p, int))
+    print(f"{count} recipes, index built in {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"{len(dense)} bitset postings, {size / 1024 / 1024:.1f} MiB of postings")
+    
+    pantries = [set(rng.sample(range(1, 60), PANTRY_SIZE // 2) + rng.sample(range(60, INGREDIENTS + 1), PANTRY_SIZE - PANTRY_SIZE // 2))
+                for _ in range(16)]
+    for pantry in pantries:
+        assert index.match(pantry, MAX_MISSING, LIMIT) == scan_match(recipes, pantry, MAX_MISSING, LIMIT)
+    
+    cycle = iter(pantries * (iterations + 10))
+    report('scan all recipes', measure(lambda: scan_match(recipes, next(cycle), MAX_MISSING, LIMIT), iterations))
+    cycle = iter(pantries * (iterations + 10))
+    report('inverted index', measure(lambda: index.match(next(cycle), MAX_MISSING, LIMIT), iterations))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+'''
+Logins per second per core for each scrypt cost setting, plus aggregate
+throughput through the bounded hasher pool. Needs no database.
+Usage: python backend/benchmarks/password_hash_bench.py [seconds_per_setting]
+'''
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import BACKEND_DIR
+
+sys.path.append(BACKEND_DIR)
+from shared import passwords
+
+LOG_N_SETTINGS = (12, 13, 14, 15, 16)
+
+def rate(fn, seconds: float) -> float:
+    done = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        fn()
+        done += 1
+    return done / (time.perf_counter() - started)
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    workers = os.cpu_count() or 1
+    print(f"{'log2(N)':<8} {'ms/login':>10} {'logins/s/core':>14} {f'logins/s x{workers}':>16}")
+    
+    for log_n in LOG_N_SETTINGS:
+        stored = passwords._hash('correct horse battery staple', log_n)
+        single = rate(lambda: passwords._verify('correct horse battery staple', stored), seconds)
+        
+        hasher = passwords.BoundedHasher(workers, workers * 4, 30)
+        with ThreadPoolExecutor(max_workers=workers * 2) as clients:
+            started = time.perf_counter()
+            jobs = [clients.submit(hasher.run, passwords._verify, 'correct horse battery staple', stored)
+                    for _ in range(max(int(single * seconds), 1) * workers)]
+            completed = sum(1 for job in jobs if job.exception() is None)
+            pooled = completed / (time.perf_counter() - started)
+        
+        print(f"{log_n:<8} {1000 / single:>10.2f} {single:>14.1f} {pooled:>16.1f}")
+
+if __name__ == '__main__':
+    main()
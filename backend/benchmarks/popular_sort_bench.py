@@ -0,0 +1,41 @@
+'''
+First page of "most popular" recipes: COUNT(*) GROUP BY over the whole
+favorites table versus sort=popular, which reads the maintained
+recipes.favorites_count through idx_recipes_favorites_count_id.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/popular_sort_bench.py [iterations]
+'''
+
+import os
+import sys
+
+import psycopg2
+
+from bench_utils import load_function, measure, report
+
+GROUP_BY_SQL = """
+    SELECT r.id, r.title, r.image_url, COUNT(f.id) AS favorites_count
+    FROM recipes r
+    LEFT JOIN favorites f ON f.recipe_id = r.id
+    GROUP BY r.id
+    ORDER BY favorites_count DESC, r.id DESC
+    LIMIT 20
+"""
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    cur = conn.cursor()
+    
+    def group_by() -> None:
+        cur.execute(GROUP_BY_SQL)
+        cur.fetchall()
+    
+    recipes = load_function('recipes')
+    page = {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {'sort': 'popular', 'limit': '20'}}
+    
+    report('COUNT(*) GROUP BY favorites', measure(group_by, iterations))
+    report('sort=popular (favorites_count)', measure(lambda: recipes.handler(page, None), iterations))
+    conn.close()
+
+if __name__ == '__main__':
+    main()
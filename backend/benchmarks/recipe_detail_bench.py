@@ -0,0 +1,51 @@
+'''
+Latency of GET /recipes?id= as one query with server-side JSON aggregation
+versus the previous multi-query approach (recipe row, then its ingredients,
+calories summed in Python).
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/recipe_detail_bench.py [recipe_id] [iterations]
+'''
+
+import sys
+from decimal import Decimal
+
+from psycopg2.extras import RealDictCursor
+
+from bench_utils import load_function, measure, report
+
+GRAMS_PER_UNIT = {'г': 1, 'кг': 1000, 'мл': 1, 'л': 1000}
+
+def main() -> None:
+    recipe_id = sys.argv[1] if len(sys.argv) > 1 else '1'
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    recipes = load_function('recipes')
+    event = {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {'id': recipe_id}}
+    
+    def multi_query() -> None:
+        conn = recipes.get_db_connection()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT r.*, u.name as author_name
+                    FROM recipes r LEFT JOIN users u ON r.user_id = u.id
+                    WHERE r.id = %s
+                """, (recipe_id,))
+                recipe = dict(cur.fetchone())
+                cur.execute("""
+                    SELECT i.id AS ingredient_id, i.name, x.amount, x.unit, i.calories_per_100g
+                    FROM recipe_ingredients x JOIN ingredients i ON i.id = x.ingredient_id
+                    WHERE x.recipe_id = %s ORDER BY x.id
+                """, (recipe_id,))
+                recipe['ingredients'] = [dict(row) for row in cur.fetchall()]
+                total = sum(
+                    row['amount'] * GRAMS_PER_UNIT[row['unit'].lower()] * (row['calories_per_100g'] or 0) / 100
+                    for row in recipe['ingredients'] if row['unit'].lower() in GRAMS_PER_UNIT
+                )
+                recipe['calories_per_serving'] = round(Decimal(total) / recipe['servings'], 1)
+        finally:
+            recipes.release_db_connection(conn)
+    
+    report('multi-query detail', measure(multi_query, iterations))
+    report('single-query detail', measure(lambda: recipes.handler(event, None), iterations))
+
+if __name__ == '__main__':
+    main()
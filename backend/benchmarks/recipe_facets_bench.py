@@ -0,0 +1,55 @@
+'''
+Filtered recipe page with facet counts: the page plus one GROUP BY count
+query per facet (four round trips) versus facets=true, which returns the
+page and all counts from one GROUPING SETS statement.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/recipe_facets_bench.py [iterations]
+'''
+
+import os
+import sys
+
+import psycopg2
+
+from bench_utils import load_function, measure, report
+
+PAGE_SQL = """
+    SELECT r.id, r.title, r.image_url, r.cooking_time, r.servings, r.difficulty, r.category_id
+    FROM recipes r
+    WHERE r.servings >= 2 AND r.difficulty = ANY(%s)
+    ORDER BY r.created_at DESC, r.id DESC
+    LIMIT 21
+"""
+FACET_SQL = {
+    'category': "SELECT r.category_id, COUNT(*) FROM recipes r WHERE r.servings >= 2 AND r.difficulty = ANY(%s) GROUP BY 1",
+    'difficulty': "SELECT r.difficulty, COUNT(*) FROM recipes r WHERE r.servings >= 2 GROUP BY 1",
+    'cooking_time': """
+        SELECT CASE WHEN r.cooking_time <= 15 THEN 'up_to_15' WHEN r.cooking_time <= 30 THEN 'up_to_30'
+                    WHEN r.cooking_time <= 60 THEN 'up_to_60' ELSE 'over_60' END, COUNT(*)
+        FROM recipes r WHERE r.servings >= 2 AND r.difficulty = ANY(%s) GROUP BY 1
+    """,
+}
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    cur = conn.cursor()
+    difficulties = ['easy', 'medium']
+    
+    def separate_queries() -> None:
+        cur.execute(PAGE_SQL, (difficulties,))
+        cur.fetchall()
+        for facet, sql in FACET_SQL.items():
+            cur.execute(sql, () if facet == 'difficulty' else (difficulties,))
+            cur.fetchall()
+    
+    recipes = load_function('recipes')
+    page = {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {
+        'difficulty': ','.join(difficulties), 'min_servings': '2', 'facets': 'true', 'limit': '20'
+    }}
+    
+    report('page + count query per facet', measure(separate_queries, iterations))
+    report('facets=true (one statement)', measure(lambda: recipes.handler(page, None), iterations))
+    conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+'''
+Statements per request and latency of recipe PUT with 30 ingredients:
+the previous delete-and-reinsert loop versus the single diff-based upsert.
+Every iteration runs inside a transaction that is rolled back.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/recipe_write_bench.py [iterations]
+'''
+
+import sys
+
+from psycopg2.extras import RealDictCursor
+
+from bench_utils import load_function, measure, report
+
+INGREDIENT_COUNT = 30
+CHANGED_PER_REQUEST = 3
+
+class CountingCursor(RealDictCursor):
+    statements = 0
+    
+    def execute(self, query, vars=None):
+        CountingCursor.statements += 1
+        return super().execute(query, vars)
+
+def legacy_put(cur, recipe_id, ingredients) -> None:
+    cur.execute("DELETE FROM recipe_ingredients WHERE recipe_id = %s", (recipe_id,))
+    for ing in ingredients:
+        cur.execute("""
+            INSERT INTO recipe_ingredients (recipe_id, ingredient_id, amount, unit)
+            VALUES (%s, %s, %s, %s)
+        """, (recipe_id, ing['ingredient_id'], ing.get('amount', ''), ing.get('unit', '')))
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    recipes = load_function('recipes')
+    conn = recipes.get_db_connection()
+    cur = conn.cursor(cursor_factory=CountingCursor)
+    
+    try:
+        cur.execute("""
+            INSERT INTO ingredients (name, unit)
+            SELECT 'bench-write-' || g, 'г' FROM generate_series(1, %s) AS g
+            RETURNING id
+        """, (INGREDIENT_COUNT,))
+        ingredient_ids = [row['id'] for row in cur.fetchall()]
+        cur.execute("""
+            INSERT INTO recipes (title, cooking_time, servings, difficulty, instructions)
+            VALUES ('bench-write', 10, 2, 'easy', '-') RETURNING id
+        """)
+        recipe_id = cur.fetchone()['id']
+        original = [{'ingredient_id': i, 'amount': 100, 'unit': 'г'} for i in ingredient_ids]
+        recipes.write_recipe_ingredients(cur, recipe_id, original, replace=False)
+        conn.commit()
+        
+        edited = [dict(ing) for ing in original]
+        for ing in edited[:CHANGED_PER_REQUEST]:
+            ing['amount'] = 150
+        
+        def run(write) -> None:
+            write()
+            conn.rollback()
+        
+        for label, write in (
+            ('delete + insert loop', lambda: legacy_put(cur, recipe_id, edited)),
+            ('diff-based bulk upsert', lambda: recipes.write_recipe_ingredients(cur, recipe_id, edited, replace=True)),
+        ):
+            CountingCursor.statements = 0
+            write()
+            conn.rollback()
+            print(f"{label:<32} {CountingCursor.statements} statements per request")
+            report(label, measure(lambda: run(write), iterations))
+    finally:
+        conn.rollback()
+        cur.execute("DELETE FROM recipe_ingredients WHERE ingredient_id IN (SELECT id FROM ingredients WHERE name LIKE 'bench-write-%%')")
+        cur.execute("DELETE FROM recipes WHERE title = 'bench-write'")
+        cur.execute("DELETE FROM ingredients WHERE name LIKE 'bench-write-%%'")
+        conn.commit()
+        cur.close()
+        recipes.release_db_connection(conn)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+'''
+Consistency check for the anonymous GET response cache (shared.response_cache)
+against a local Postgres. A writer thread keeps renaming one recipe and
+records the last committed title; reader threads request the recipe through
+the cached handler and fail if they ever get a title older than the one
+committed before their request started. Also reports how many lookups were
+served from the cache and how many entries LISTEN/NOTIFY evicted.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/response_cache_check.py [seconds] [readers]
+'''
+
+import json
+import os
+import sys
+import threading
+import time
+
+import psycopg2
+
+from bench_utils import BACKEND_DIR, load_function
+
+os.environ['RESPONSE_CACHE_SIZE'] = os.environ.get('RESPONSE_CACHE_CHECK_SIZE', '512')
+sys.path.append(BACKEND_DIR)
+from shared.response_cache import response_cache_stats
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    cur = conn.cursor()
+    cur.execute("SELECT id, title FROM recipes ORDER BY id LIMIT 1")
+    row = cur.fetchone()
+    if row is None:
+        sys.exit('recipes table is empty')
+    recipe_id, original_title = row
+    
+    recipes = load_function('recipes')
+    event = {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {'id': str(recipe_id)}}
+    
+    committed = [0]
+    stale = []
+    served = {'HIT': 0, 'MISS': 0}
+    deadline = time.perf_counter() + seconds
+    
+    def writer() -> None:
+        revision = 0
+        while time.perf_counter() < deadline:
+            revision += 1
+            cur.execute("UPDATE recipes SET title = %s WHERE id = %s", (f'cache-check {revision}', recipe_id))
+            conn.commit()
+            committed[0] = revision
+            time.sleep(0.005)
+    
+    def reader() -> None:
+        while time.perf_counter() < deadline:
+            expected = committed[0]
+            response = recipes.handler(event, None)
+            title = json.loads(response['body'])['title']
+            seen = int(title.rsplit(' ', 1)[1]) if title.startswith('cache-check ') else 0
+            served[response['headers'].get('X-Cache', 'MISS')] += 1
+            if seen < expected:
+                stale.append((expected, seen))
+    
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    cur.execute("UPDATE recipes SET title = %s WHERE id = %s", (original_title, recipe_id))
+    conn.commit()
+    conn.close()
+    # give the listener a moment to deliver the last notifications
+    time.sleep(0.5)
+    
+    print(f"{committed[0]} writes, {served['HIT']} cache hits, {served['MISS']} misses, "
+          f"{len(stale)} stale responses; cache counters {response_cache_stats()}")
+    if stale:
+        sys.exit(f'stale responses served, first (committed, seen): {stale[0]}')
+
+if __name__ == '__main__':
+    main()
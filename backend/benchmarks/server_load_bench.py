@@ -0,0 +1,56 @@
+'''
+Throughput of the local server (backend/server.py) under concurrent
+keep-alive clients. Start the server first, e.g. with 1 and then 4
+processes, and compare requests per second across cores.
+Usage: python backend/benchmarks/server_load_bench.py [url] [clients] [seconds]
+       default url http://127.0.0.1:8000/recipes?limit=20
+'''
+
+import http.client
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from bench_utils import summarize
+
+def client(url, deadline: float, samples, errors) -> None:
+    target = urlsplit(url)
+    path = target.path + (f'?{target.query}' if target.query else '')
+    conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+    local = []
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException):
+            errors.append('connection')
+            conn.close()
+            conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+            continue
+        local.append((time.perf_counter() - started) * 1000)
+    conn.close()
+    samples.extend(local)
+
+def main() -> None:
+    url = sys.argv[1] if len(sys.argv) > 1 else 'http://127.0.0.1:8000/recipes?limit=20'
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    samples, errors = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(url, deadline, samples, errors)) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    stats = summarize(samples)
+    print(f"{url} with {clients} clients for {seconds:.0f}s: {len(samples) / seconds:,.0f} req/s, "
+          f"p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, {len(errors)} errors")
+
+if __name__ == '__main__':
+    main()
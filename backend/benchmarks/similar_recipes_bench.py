@@ -0,0 +1,79 @@
+'''
+Similar-recipe lookup on a synthetic catalog: exact Jaccard against every
+recipe versus the MinHash/LSH index, with recall of the LSH top 10 against
+the exact top 10. Recipes come in families of variations of a base recipe so
+that near neighbours exist. Needs no database.
+Usage: python backend/benchmarks/similar_recipes_bench.py [recipes] [iterations]
+'''
+
+import random
+import sys
+import time
+
+from bench_utils import BACKEND_DIR, measure, report
+
+sys.path.append(BACKEND_DIR)
+from shared.similar import SIGNATURE_SIZE, SimilarityIndex
+
+INGREDIENTS = 3000
+PRIME = 2147483647
+TOP = 10
+
+def synthetic_recipes(count: int, rng: random.Random):
+    recipes = {}
+    base = None
+    for recipe_id in range(1, count + 1):
+        if recipe_id % 20 == 1:
+            base = set(rng.sample(range(1, INGREDIENTS + 1), rng.randint(6, 14)))
+        variant = set(base)
+        for _ in range(rng.randint(0, 3)):
+            variant.discard(rng.choice(sorted(variant)))
+            variant.add(rng.randint(1, INGREDIENTS))
+        recipes[recipe_id] = variant
+    return recipes
+
+def minhash(ingredients, seeds):
+    # same hash family as minhash_seeds in V0009
+    return [min((a * x + b) % PRIME for x in ingredients) for a, b in seeds]
+
+def exact_similar(recipes, recipe_id, limit):
+    own = recipes[recipe_id]
+    scored = sorted(
+        (-len(own & other) / len(own | other), other_id)
+        for other_id, other in recipes.items() if other_id != recipe_id
+    )
+    return [other_id for _, other_id in scored[:limit]]
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(7)
+    recipes = synthetic_recipes(count, rng)
+    seeds = [(rng.randint(1, PRIME - 1), rng.randint(0, PRIME - 1)) for _ in range(SIGNATURE_SIZE)]
+    
+    signatures = {recipe_id: minhash(ingredients, seeds) for recipe_id, ingredients in recipes.items()}
+    index = SimilarityIndex()
+    started = time.perf_counter()
+    for recipe_id, signature in signatures.items():
+        index.add(recipe_id, signature)
+    print(f"{count} recipes indexed in {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"{index.signatures.itemsize * len(index.signatures) / 1024 / 1024:.1f} MiB of signatures")
+    
+    sample = rng.sample(sorted(recipes), 20)
+    recall = []
+    for recipe_id in sample:
+        exact = exact_similar(recipes, recipe_id, TOP)
+        # estimates are noisy around ties, so look a little deeper than TOP
+        found = {other_id for other_id, _ in index.similar(recipe_id, TOP * 3)}
+        recall.append(sum(other_id in found for other_id in exact) / TOP)
+    print(f"LSH recall@{TOP} (within top {TOP * 3}): {sum(recall) / len(recall):.2f}")
+    
+    queries = iter(rng.choices(sorted(recipes), k=iterations * 2 + 20))
+    report('exact Jaccard scan', measure(lambda: exact_similar(recipes, next(queries), TOP), min(iterations, 10), warmup=1))
+    report('MinHash/LSH index', measure(lambda: index.similar(next(queries), TOP), iterations))
+    
+    updates = iter(rng.choices(sorted(recipes), k=iterations + 10))
+    report('incremental signature update', measure(lambda: index.add(next(updates), minhash(set(rng.sample(range(1, INGREDIENTS + 1), 8)), seeds)), iterations))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+'''
+Trending feed reads as the event tables grow: scoring recipes per request
+(the view's query run inline) versus reading the precomputed
+recipe_trending view with sort=trending. Each round adds synthetic favorites
+and meal plans, refreshes the view and times both reads, so the inline cost
+grows with the events while the feed read stays flat.
+Inserts synthetic rows, so point it at a throwaway database with
+db_migrations applied.
+Usage: DATABASE_URL=postgresql://... python backend/benchmarks/trending_feed_bench.py [rounds] [events_per_round]
+'''
+
+import os
+import sys
+import time
+
+import psycopg2
+
+from bench_utils import BACKEND_DIR, load_function, measure, report
+
+sys.path.append(BACKEND_DIR)
+from shared.trending import refresh_trending
+
+INLINE_SQL = """
+    SELECT r.id,
+           ((1 + 0.5 * r.favorites_count + 2 * COALESCE(f.n, 0) + 3 * COALESCE(m.n, 0))
+            / power(EXTRACT(EPOCH FROM (now() - r.created_at)) / 3600 + 2, 1.5))::float8 AS score
+    FROM recipes r
+    LEFT JOIN (SELECT recipe_id, COUNT(*) AS n FROM favorites
+               WHERE created_at > now() - interval '7 days' GROUP BY recipe_id) f ON f.recipe_id = r.id
+    LEFT JOIN (SELECT recipe_id, COUNT(*) AS n FROM meal_plans
+               WHERE created_at > now() - interval '14 days' GROUP BY recipe_id) m ON m.recipe_id = r.id
+    ORDER BY score DESC, r.id DESC
+    LIMIT 20
+"""
+
+def add_events(cur, recipe_ids, count: int) -> None:
+    # a fresh batch of users keeps UNIQUE(user_id, recipe_id) on favorites mostly satisfied
+    cur.execute("""
+        INSERT INTO users (email, password_hash, name)
+        SELECT 'bench-' || md5(random()::text) || '@example.com', '-', 'bench'
+        FROM generate_series(1, %s)
+        RETURNING id
+    """, (max(count // 50, 1),))
+    user_ids = [row[0] for row in cur.fetchall()]
+    cur.execute("""
+        INSERT INTO favorites (user_id, recipe_id, created_at)
+        SELECT u.id, (%s::int[])[1 + floor(random() * %s)::int], now() - random() * interval '10 days'
+        FROM unnest(%s::int[]) AS u(id), generate_series(1, 50)
+        ON CONFLICT DO NOTHING
+    """, (recipe_ids, len(recipe_ids), user_ids))
+    cur.execute("""
+        INSERT INTO meal_plans (user_id, recipe_id, plan_date, meal_type, created_at)
+        SELECT %s, (%s::int[])[1 + floor(random() * %s)::int],
+               current_date, 'dinner', now() - random() * interval '20 days'
+        FROM generate_series(1, %s)
+    """, (user_ids[0], recipe_ids, len(recipe_ids), count))
+
+def main() -> None:
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    per_round = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    cur = conn.cursor()
+    recipes = load_function('recipes')
+    feed = {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {'sort': 'trending', 'limit': '20'}}
+    
+    cur.execute("SELECT id FROM recipes")
+    recipe_ids = [row[0] for row in cur.fetchall()]
+    
+    def inline() -> None:
+        cur.execute(INLINE_SQL)
+        cur.fetchall()
+    
+    for round_number in range(1, rounds + 1):
+        add_events(cur, recipe_ids, per_round)
+        conn.commit()
+        started = time.perf_counter()
+        refresh_trending(conn)
+        print(f"round {round_number}: +{per_round} events, refresh {(time.perf_counter() - started) * 1000:.0f} ms")
+        report('  per-request scoring', measure(inline, 20, warmup=2))
+        report('  sort=trending (view)', measure(lambda: recipes.handler(feed, None), 200))
+    
+    conn.close()
+
+if __name__ == '__main__':
+    main()
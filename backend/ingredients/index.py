@@ -6,50 +6,34 @@ Returns: HTTP response with ingredient data or error message
 
 import json
 import os
-from typing import Dict, Any, Optional
+import sys
+from typing import Dict, Any
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import hashlib
-import hmac
-import base64
-from datetime import datetime
 
-def get_db_connection():
-    return psycopg2.connect(os.environ['DATABASE_URL'])
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.auth import get_user_from_token
+from shared.autocomplete import get_name_index, like_pattern, normalize_name, refresh_name_index
+from shared.catalog import catalog_etag, get_catalog_version
+from shared.db import get_db_connection, release_db_connection
+from shared.http import compressed, etag_matches, get_header
+from shared.nutrition import refresh_recipe_nutrition
+from shared.pagination import decode_cursor, encode_cursor, parse_limit
+from shared.response_cache import cached_get
+from shared.similar import refresh_recipe_signatures
+from shared.sync import fetch_changes, parse_watermark
 
-def verify_jwt(token: str) -> Optional[Dict[str, Any]]:
-    try:
-        secret = os.environ.get('JWT_SECRET', 'default-secret-key-change-in-production')
-        parts = token.split('.')
-        if len(parts) != 3:
-            return None
-        
-        header, payload, signature = parts
-        
-        expected_signature = base64.urlsafe_b64encode(
-            hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
-        ).decode().rstrip('=')
-        
-        if signature != expected_signature:
-            return None
-        
-        payload_data = json.loads(base64.urlsafe_b64decode(payload + '=='))
-        
-        if payload_data['exp'] < int(datetime.utcnow().timestamp()):
-            return None
-        
-        return payload_data
-    except Exception:
-        return None
-
-def get_user_from_token(headers: Dict[str, str]) -> Optional[int]:
-    token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
-    if not token:
-        return None
-    
-    payload = verify_jwt(token)
-    return payload['user_id'] if payload else None
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DEFAULT_SYNC_SIZE = 500
+MAX_SYNC_SIZE = 1000
+DEFAULT_AUTOCOMPLETE_SIZE = 10
+MAX_AUTOCOMPLETE_SIZE = 50
+# shorter fragments have no trigram to search the substring index with
+MIN_SUBSTRING_LENGTH = 3
 
+@compressed
+@cached_get('ingredients', uncacheable=('updated_since',))
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     headers = event.get('headers', {})
@@ -60,7 +44,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token, If-None-Match',
                 'Access-Control-Max-Age': '86400'
             },
             'body': '',
@@ -75,23 +59,122 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             params = event.get('queryStringParameters') or {}
             category = params.get('category')
             search = params.get('search')
+            updated_since = params.get('updated_since')
+            autocomplete = params.get('autocomplete')
+            
+            if updated_since:
+                try:
+                    since = parse_watermark(updated_since)
+                    limit = parse_limit(params.get('limit'), DEFAULT_SYNC_SIZE, MAX_SYNC_SIZE)
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                changes = fetch_changes(
+                    cur, 'ingredients',
+                    "SELECT i.id, i.name, i.unit, i.calories_per_100g, i.created_at, i.updated_at FROM ingredients i",
+                    'i', since, limit
+                )
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps(changes, default=str),
+                    'isBase64Encoded': False
+                }
+            
+            if autocomplete:
+                try:
+                    limit = parse_limit(params.get('limit'), DEFAULT_AUTOCOMPLETE_SIZE, MAX_AUTOCOMPLETE_SIZE)
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                matches = get_name_index(cur).complete(autocomplete, limit)
+                fragment = normalize_name(autocomplete)
+                
+                # prefix matches come first; substrings inside words fill the rest
+                if len(matches) < limit and len(fragment) >= MIN_SUBSTRING_LENGTH:
+                    cur.execute("""
+                        SELECT id, name, unit, calories_per_100g FROM ingredients
+                        WHERE normalize_ingredient_name(name) LIKE %s AND NOT (id = ANY(%s))
+                        ORDER BY name ASC, id ASC LIMIT %s
+                    """, (like_pattern(fragment), [row['id'] for row in matches], limit - len(matches)))
+                    matches = matches + [dict(row) for row in cur.fetchall()]
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps(matches, default=str),
+                    'isBase64Encoded': False
+                }
+            
+            try:
+                limit = parse_limit(params.get('limit'), DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+                page_cursor = decode_cursor(params.get('cursor'), 'text')
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': str(e)}),
+                    'isBase64Encoded': False
+                }
+            
+            etag = catalog_etag('ingredients', get_catalog_version(cur, 'ingredients'))
+            
+            if etag_matches(get_header(headers, 'If-None-Match'), etag):
+                return {
+                    'statusCode': 304,
+                    'headers': {
+                        'ETag': etag,
+                        'Cache-Control': 'no-cache',
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor'
+                    },
+                    'body': '',
+                    'isBase64Encoded': False
+                }
             
             query = "SELECT id, name, unit, calories_per_100g, created_at FROM ingredients WHERE 1=1"
             params_list = []
             
             if search:
-                query += " AND name ILIKE %s"
-                params_list.append(f"%{search}%")
+                query += " AND normalize_ingredient_name(name) LIKE %s"
+                params_list.append(like_pattern(normalize_name(search)))
             
-            query += " ORDER BY name ASC"
+            if page_cursor:
+                query += " AND (name, id) > (%s, %s)"
+                params_list.extend(page_cursor)
+            
+            query += " ORDER BY name ASC, id ASC LIMIT %s"
+            params_list.append(limit + 1)
             
             cur.execute(query, params_list)
-            ingredients = cur.fetchall()
+            ingredients = [dict(i) for i in cur.fetchall()]
+            
+            response_headers = {
+                'Content-Type': 'application/json',
+                'ETag': etag,
+                'Cache-Control': 'no-cache',
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor'
+            }
+            if len(ingredients) > limit:
+                ingredients = ingredients[:limit]
+                response_headers['X-Next-Cursor'] = encode_cursor([ingredients[-1]['name'], ingredients[-1]['id']])
             
             return {
                 'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps([dict(i) for i in ingredients], default=str),
+                'headers': response_headers,
+                'body': json.dumps(ingredients, default=str),
                 'isBase64Encoded': False
             }
         
@@ -125,6 +208,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 
                 ingredient = cur.fetchone()
                 conn.commit()
+                refresh_name_index(cur)
                 
                 return {
                     'statusCode': 201,
@@ -173,9 +257,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             
-            cur.execute("DELETE FROM recipe_ingredients WHERE ingredient_id = %s", (ingredient_id,))
+            cur.execute("DELETE FROM recipe_ingredients WHERE ingredient_id = %s RETURNING recipe_id", (ingredient_id,))
+            affected_recipe_ids = [row['recipe_id'] for row in cur.fetchall()]
             cur.execute("DELETE FROM ingredients WHERE id = %s", (ingredient_id,))
+            # a new ingredient is not used by any recipe yet, so only deletions change recipe totals
+            refresh_recipe_nutrition(cur, affected_recipe_ids)
+            refresh_recipe_signatures(cur, affected_recipe_ids)
             conn.commit()
+            refresh_name_index(cur)
             
             return {
                 'statusCode': 200,
@@ -194,4 +283,4 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        release_db_connection(conn)
\ No newline at end of file
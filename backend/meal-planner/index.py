@@ -6,50 +6,142 @@ Returns: HTTP response with meal plan data or error message
 
 import json
 import os
-from typing import Dict, Any, Optional
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import hashlib
-import hmac
-import base64
-from datetime import datetime
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+from psycopg2.extras import RealDictCursor, execute_values
+from datetime import date
+from decimal import Decimal
 
-def get_db_connection():
-    return psycopg2.connect(os.environ['DATABASE_URL'])
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.auth import get_user_from_token
+from shared.db import get_db_connection, release_db_connection
+from shared.http import compressed
 
-def verify_jwt(token: str) -> Optional[Dict[str, Any]]:
+MAX_BATCH_SLOTS = 200
+MAX_MEAL_TYPE_LENGTH = 20
+
+# unit -> (base unit, amount of base unit in one unit)
+UNIT_CONVERSIONS = {
+    'г': ('г', 1), 'гр': ('г', 1), 'кг': ('г', 1000),
+    'мл': ('мл', 1), 'л': ('мл', 1000),
+    'шт': ('шт', 1), 'шт.': ('шт', 1),
+}
+# base unit -> (larger unit, threshold in base units) for presenting totals
+DISPLAY_UNITS = {'г': ('кг', 1000), 'мл': ('л', 1000)}
+
+def parse_slot(slot: Any, required_fields: List[str]) -> Tuple[Optional[Tuple[Any, ...]], Optional[str]]:
+    if not isinstance(slot, dict):
+        return None, 'Slot must be an object'
+    for field in required_fields:
+        if field not in slot:
+            return None, f'Missing required field: {field}'
     try:
-        secret = os.environ.get('JWT_SECRET', 'default-secret-key-change-in-production')
-        parts = token.split('.')
-        if len(parts) != 3:
-            return None
-        
-        header, payload, signature = parts
-        
-        expected_signature = base64.urlsafe_b64encode(
-            hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
-        ).decode().rstrip('=')
-        
-        if signature != expected_signature:
-            return None
-        
-        payload_data = json.loads(base64.urlsafe_b64decode(payload + '=='))
-        
-        if payload_data['exp'] < int(datetime.utcnow().timestamp()):
-            return None
-        
-        return payload_data
-    except Exception:
-        return None
+        meal_date = date.fromisoformat(str(slot['meal_date']))
+    except ValueError:
+        return None, 'meal_date must be YYYY-MM-DD'
+    meal_type = str(slot['meal_type'])
+    if not meal_type or len(meal_type) > MAX_MEAL_TYPE_LENGTH:
+        return None, f'meal_type must be 1 to {MAX_MEAL_TYPE_LENGTH} characters'
+    key = (meal_date, meal_type)
+    if 'recipe_id' not in required_fields:
+        return key, None
+    recipe_id = slot['recipe_id']
+    # bool is an int subclass; ids beyond int4 cannot exist in recipes
+    if not isinstance(recipe_id, int) or isinstance(recipe_id, bool) or not 0 < recipe_id < 2 ** 31:
+        return None, 'recipe_id must be a positive integer'
+    return key + (recipe_id,), None
+
+def apply_meal_plan_batch(cur, user_id: int, upserts: List[Any], deletes: List[Any]) -> List[Dict[str, Any]]:
+    '''
+    Applies a list of slot deletions and upserts with one bulk statement each
+    (deletions first) and returns a result per input slot, in input order.
+    A slot listed twice in upsert is written once, with the last recipe_id.
+    Upserts of recipes that do not exist are skipped and reported as not_found.
+    '''
+    results: List[Dict[str, Any]] = []
+    delete_keys: Dict[Tuple[Any, str], List[Dict[str, Any]]] = {}
+    upsert_rows: Dict[Tuple[Any, str], Tuple[Any, ...]] = {}
+    upsert_results: Dict[Tuple[Any, str], List[Dict[str, Any]]] = {}
+    
+    for index, slot in enumerate(deletes):
+        parsed, error = parse_slot(slot, ['meal_date', 'meal_type'])
+        result: Dict[str, Any] = {'op': 'delete', 'index': index}
+        if error:
+            result.update(status='invalid', error=error)
+        else:
+            delete_keys.setdefault(parsed, []).append(result)
+        results.append(result)
+    
+    for index, slot in enumerate(upserts):
+        parsed, error = parse_slot(slot, ['recipe_id', 'meal_date', 'meal_type'])
+        result = {'op': 'upsert', 'index': index}
+        if error:
+            result.update(status='invalid', error=error)
+        else:
+            key = parsed[:2]
+            for earlier in upsert_results.get(key, []):
+                earlier.update(status='superseded', error='Slot is set again later in the batch')
+            upsert_rows[key] = (user_id, parsed[2], parsed[0], parsed[1])
+            upsert_results[key] = [result]
+        results.append(result)
+    
+    if delete_keys:
+        deleted = execute_values(cur, """
+            DELETE FROM meal_plans mp
+            USING (VALUES %s) AS d(user_id, meal_date, meal_type)
+            WHERE mp.user_id = d.user_id AND mp.meal_date = d.meal_date AND mp.meal_type = d.meal_type
+            RETURNING mp.meal_date, mp.meal_type
+        """, [(user_id,) + key for key in delete_keys], template='(%s::int, %s::date, %s::varchar)',
+            page_size=len(delete_keys), fetch=True)
+        deleted_keys = {(row['meal_date'], row['meal_type']) for row in deleted}
+        for key, key_results in delete_keys.items():
+            for result in key_results:
+                result['status'] = 'deleted' if key in deleted_keys else 'not_found'
+    
+    if upsert_rows:
+        written = execute_values(cur, """
+            INSERT INTO meal_plans (user_id, recipe_id, meal_date, meal_type)
+            SELECT v.user_id, v.recipe_id, v.meal_date, v.meal_type
+            FROM (VALUES %s) AS v(user_id, recipe_id, meal_date, meal_type)
+            JOIN recipes r ON r.id = v.recipe_id
+            ON CONFLICT (user_id, meal_date, meal_type)
+            DO UPDATE SET recipe_id = EXCLUDED.recipe_id
+            RETURNING id, user_id, recipe_id, meal_date, meal_type, created_at
+        """, list(upsert_rows.values()), template='(%s::int, %s::int, %s::date, %s::varchar)',
+            page_size=len(upsert_rows), fetch=True)
+        for row in written:
+            for result in upsert_results[(row['meal_date'], row['meal_type'])]:
+                result.update(status='upserted', meal_plan=dict(row))
+        for key_results in upsert_results.values():
+            for result in key_results:
+                if 'status' not in result:
+                    result.update(status='not_found', error='Recipe not found')
+    
+    return results
 
-def get_user_from_token(headers: Dict[str, str]) -> Optional[int]:
-    token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
-    if not token:
-        return None
+def consolidate_shopping_list(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    '''
+    Merges per-(ingredient, unit) sums into one line per ingredient and base
+    unit using UNIT_CONVERSIONS, then shows large amounts in кг/л.
+    Units missing from the table are listed as they are.
+    '''
+    totals: Dict[Tuple[int, str], Dict[str, Any]] = {}
+    for row in rows:
+        base_unit, factor = UNIT_CONVERSIONS.get(row['unit'], (row['unit'], 1))
+        key = (row['ingredient_id'], base_unit)
+        item = totals.setdefault(key, {'ingredient_id': row['ingredient_id'], 'name': row['name'], 'amount': Decimal(0), 'unit': base_unit})
+        item['amount'] += row['amount'] * factor
     
-    payload = verify_jwt(token)
-    return payload['user_id'] if payload else None
+    items = sorted(totals.values(), key=lambda item: (item['name'], item['unit']))
+    for item in items:
+        display_unit, divisor = DISPLAY_UNITS.get(item['unit'], (item['unit'], 1))
+        if item['amount'] >= divisor:
+            item['amount'] /= divisor
+            item['unit'] = display_unit
+        item['amount'] = float(round(item['amount'], 2))
+    return items
 
+@compressed
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     headers = event.get('headers', {})
@@ -83,8 +175,56 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     try:
         if method == 'GET':
             params = event.get('queryStringParameters') or {}
-            start_date = params.get('start_date')
-            end_date = params.get('end_date')
+            try:
+                start_date = date.fromisoformat(params['start_date']) if params.get('start_date') else None
+                end_date = date.fromisoformat(params['end_date']) if params.get('end_date') else None
+            except ValueError:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'start_date and end_date must be YYYY-MM-DD'}),
+                    'isBase64Encoded': False
+                }
+            
+            if params.get('action') == 'shopping_list':
+                if not start_date or not end_date:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'start_date and end_date are required'}),
+                        'isBase64Encoded': False
+                    }
+                
+                servings = params.get('servings')
+                if servings is not None and (not (servings.isascii() and servings.isdigit()) or int(servings) < 1):
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'servings must be a positive integer'}),
+                        'isBase64Encoded': False
+                    }
+                
+                cur.execute("""
+                    SELECT i.id AS ingredient_id, i.name, lower(x.unit) AS unit,
+                           SUM(x.amount * COALESCE(%s::numeric / NULLIF(r.servings, 0), 1)) AS amount
+                    FROM meal_plans mp
+                    JOIN recipes r ON r.id = mp.recipe_id
+                    JOIN recipe_ingredients x ON x.recipe_id = r.id
+                    JOIN ingredients i ON i.id = x.ingredient_id
+                    WHERE mp.user_id = %s AND mp.meal_date >= %s AND mp.meal_date <= %s
+                    GROUP BY i.id, i.name, lower(x.unit)
+                """, (servings, user_id, start_date, end_date))
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({
+                        'start_date': start_date,
+                        'end_date': end_date,
+                        'items': consolidate_shopping_list(cur.fetchall())
+                    }, default=str),
+                    'isBase64Encoded': False
+                }
             
             query = """
                 SELECT mp.*, r.title as recipe_title, r.image_url as recipe_image,
@@ -118,6 +258,45 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         elif method == 'POST':
             body_data = json.loads(event.get('body', '{}'))
             
+            if body_data.get('action') == 'batch':
+                upserts = body_data.get('upsert') or []
+                deletes = body_data.get('delete') or []
+                
+                if not isinstance(upserts, list) or not isinstance(deletes, list):
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'upsert and delete must be lists of slots'}),
+                        'isBase64Encoded': False
+                    }
+                
+                if len(upserts) + len(deletes) > MAX_BATCH_SLOTS:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': f'A batch can contain at most {MAX_BATCH_SLOTS} slots'}),
+                        'isBase64Encoded': False
+                    }
+                
+                try:
+                    results = apply_meal_plan_batch(cur, user_id, upserts, deletes)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    return {
+                        'statusCode': 500,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'results': results}, default=str),
+                    'isBase64Encoded': False
+                }
+            
             required_fields = ['recipe_id', 'meal_date', 'meal_type']
             for field in required_fields:
                 if field not in body_data:
@@ -217,4 +396,4 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     finally:
         cur.close()
-        conn.close()
+        release_db_connection(conn)
@@ -6,50 +6,296 @@ Returns: HTTP response with recipe data or error message
 
 import json
 import os
-from typing import Dict, Any, Optional
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import hashlib
-import hmac
-import base64
-from datetime import datetime
+import sys
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from psycopg2.extras import RealDictCursor, execute_values
 
-def get_db_connection():
-    return psycopg2.connect(os.environ['DATABASE_URL'])
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.auth import get_user_from_token
+from shared.catalog import catalog_etag, get_catalog_version
+from shared.db import get_db_connection, release_db_connection
+from shared.http import compressed, etag_matches, get_header
+from shared.nutrition import refresh_recipe_nutrition
+from shared.pagination import decode_cursor, encode_cursor, parse_limit
+from shared.pantry import get_pantry_index
+from shared.response_cache import cached_get
+from shared.similar import get_similarity_index, refresh_recipe_signatures
+from shared.sync import fetch_changes, parse_watermark
 
-def verify_jwt(token: str) -> Optional[Dict[str, Any]]:
-    try:
-        secret = os.environ.get('JWT_SECRET', 'default-secret-key-change-in-production')
-        parts = token.split('.')
-        if len(parts) != 3:
-            return None
-        
-        header, payload, signature = parts
-        
-        expected_signature = base64.urlsafe_b64encode(
-            hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
-        ).decode().rstrip('=')
-        
-        if signature != expected_signature:
-            return None
-        
-        payload_data = json.loads(base64.urlsafe_b64decode(payload + '=='))
-        
-        if payload_data['exp'] < int(datetime.utcnow().timestamp()):
-            return None
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DEFAULT_SYNC_SIZE = 500
+MAX_SYNC_SIZE = 1000
+
+EXPORT_BATCH_SIZE = 500
+# rows per export response; longer exports continue with the X-Next-Cursor header
+EXPORT_MAX_ROWS = 5000
+MAX_BATCH_IDS = 100
+MAX_PANTRY_IDS = 200
+DEFAULT_SIMILAR_SIZE = 10
+DEFAULT_PANTRY_MISSING = 2
+MAX_FACET_VALUES = 20
+MAX_INGREDIENT_FILTERS = 20
+
+EXPORT_CONTENT_TYPES = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+# field name -> SQL expression; only requested fields are selected, so large
+# TEXT columns (description, instructions) are not read unless asked for
+RECIPE_FIELDS = {
+    'id': "r.id",
+    'user_id': "r.user_id",
+    'title': "r.title",
+    'description': "r.description",
+    'image_url': "r.image_url",
+    'cooking_time': "r.cooking_time",
+    'servings': "r.servings",
+    'difficulty': "r.difficulty",
+    'category_id': "r.category_id",
+    'instructions': "r.instructions",
+    'created_at': "r.created_at",
+    'updated_at': "r.updated_at",
+    'calories_per_serving': "r.calories_per_serving",
+    'favorites_count': "r.favorites_count",
+    'author_name': "u.name",
+}
+FIELD_SETS = {
+    'summary': ['id', 'title', 'image_url', 'cooking_time', 'servings', 'difficulty', 'category_id', 'calories_per_serving'],
+    'full': list(RECIPE_FIELDS),
+}
+
+# sort name -> (SQL expression, cursor value type, descending)
+RECIPE_SORTS = {
+    'newest': ("r.created_at", 'timestamp', True),
+    'relevance': ("(ts_rank_cd(r.search_vector, s.q) + word_similarity(s.term, lower(r.title)))::float8", 'float8', True),
+    'calories': ("r.calories_per_serving", 'numeric', False),
+    'popular': ("r.favorites_count", 'int', True),
+    'trending': ("t.score", 'float8', True),
+}
+
+# cooking_time facet: bucket label -> inclusive upper bound in minutes, the last one open-ended
+COOKING_TIME_BUCKETS = [('up_to_15', 15), ('up_to_30', 30), ('up_to_60', 60), ('over_60', None)]
+COOKING_TIME_BUCKET_SQL = "CASE " + ' '.join(
+    f"WHEN r.cooking_time <= {bound} THEN '{label}'" for label, bound in COOKING_TIME_BUCKETS if bound is not None
+) + f" ELSE '{COOKING_TIME_BUCKETS[-1][0]}' END"
+FACETS = ('category', 'difficulty', 'cooking_time')
+
+def build_tsquery(search: str) -> Optional[str]:
+    words = re.findall(r'\w+', search.lower())
+    if not words:
+        return None
+    return ' & '.join(words[:-1] + [words[-1] + ':*'])
+
+def stream_rows(conn, query: str, params_list: List[Any], export_format: str, max_rows: int) -> Tuple[str, Optional[List[Any]]]:
+    '''
+    Reads up to max_rows rows through a named (server-side) cursor in batches
+    of EXPORT_BATCH_SIZE and encodes each batch into one string before the
+    next is fetched; the body is a single join of those strings. The query
+    selects sort_key; if rows remain after max_rows, the cursor values of
+    the last exported row are returned for the next page.
+    '''
+    pieces = ['['] if export_format == 'json' else []
+    next_cursor = None
+    exported = 0
+    
+    with conn.cursor(name='recipes_export', cursor_factory=RealDictCursor) as cur:
+        cur.itersize = EXPORT_BATCH_SIZE
+        cur.execute(query, params_list)
         
-        return payload_data
-    except Exception:
+        while exported < max_rows:
+            rows = cur.fetchmany(min(EXPORT_BATCH_SIZE, max_rows - exported))
+            if not rows:
+                break
+            exported += len(rows)
+            last_row = rows[-1]
+            if exported == max_rows and cur.fetchone() is not None:
+                next_cursor = [last_row['sort_key'], last_row['id']]
+            for row in rows:
+                row.pop('sort_key', None)
+            encoded = [json.dumps(row, default=str) for row in rows]
+            if export_format == 'ndjson':
+                encoded.append('')
+                pieces.append('\n'.join(encoded))
+            else:
+                if len(pieces) > 1:
+                    pieces.append(',')
+                pieces.append(','.join(encoded))
+    
+    if export_format == 'json':
+        pieces.append(']')
+    return ''.join(pieces), next_cursor
+
+def validate_ingredients(ingredients: Any) -> None:
+    '''Rejects ingredient lists the write below cannot store as (recipe_id, ingredient_id) rows.'''
+    if not isinstance(ingredients, list):
+        raise ValueError('ingredients must be a list')
+    for ing in ingredients:
+        if not isinstance(ing, dict):
+            raise ValueError('Each ingredient must be an object')
+        ingredient_id = ing.get('ingredient_id')
+        if not isinstance(ingredient_id, int) or isinstance(ingredient_id, bool) or not 0 < ingredient_id < 2 ** 31:
+            raise ValueError('ingredient_id must be a positive integer')
+
+def write_recipe_ingredients(cur, recipe_id: Any, ingredients: List[Dict[str, Any]], replace: bool) -> None:
+    '''
+    Writes a recipe's ingredient list in one statement. Rows whose amount and
+    unit did not change are left untouched; with replace=True ingredients
+    missing from the list are deleted in the same statement.
+    '''
+    rows = {
+        ing['ingredient_id']: (recipe_id, ing['ingredient_id'], ing.get('amount', ''), ing.get('unit', ''))
+        for ing in ingredients
+    }
+    
+    if not rows:
+        if replace:
+            cur.execute("DELETE FROM recipe_ingredients WHERE recipe_id = %s", (recipe_id,))
+        return
+    
+    removed = """
+        , removed AS (
+            DELETE FROM recipe_ingredients
+            WHERE recipe_id IN (SELECT recipe_id FROM incoming)
+              AND NOT EXISTS (
+                  SELECT 1 FROM incoming
+                  WHERE incoming.recipe_id = recipe_ingredients.recipe_id
+                    AND incoming.ingredient_id = recipe_ingredients.ingredient_id
+              )
+        )
+    """ if replace else ""
+    
+    execute_values(cur, f"""
+        WITH incoming (recipe_id, ingredient_id, amount, unit) AS (VALUES %s)
+        {removed}
+        INSERT INTO recipe_ingredients (recipe_id, ingredient_id, amount, unit)
+        SELECT recipe_id, ingredient_id, amount, unit FROM incoming
+        ON CONFLICT (recipe_id, ingredient_id) DO UPDATE
+        SET amount = EXCLUDED.amount, unit = EXCLUDED.unit
+        WHERE (recipe_ingredients.amount, recipe_ingredients.unit)
+              IS DISTINCT FROM (EXCLUDED.amount, EXCLUDED.unit)
+    """, list(rows.values()), template='(%s::int, %s::int, %s::numeric, %s::varchar)', page_size=len(rows))
+
+def parse_id_list(value: str, maximum: int, name: str = 'recipe id') -> List[int]:
+    ids: List[int] = []
+    seen = set()
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if not item.isdigit():
+            raise ValueError(f'Invalid {name}: {item}')
+        if int(item) not in seen:
+            seen.add(int(item))
+            ids.append(int(item))
+        if len(ids) > maximum:
+            raise ValueError(f'At most {maximum} ids can be requested at once')
+    return ids
+
+def parse_value_list(value: str, maximum: int, name: str) -> List[str]:
+    values: List[str] = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if item not in values:
+            values.append(item)
+        if len(values) > maximum:
+            raise ValueError(f'At most {maximum} {name} values can be requested at once')
+    return values
+
+def facet_counts_sql(filter_sql: str, facet_filters: Dict[str, Tuple[str, List[Any]]]) -> Tuple[str, List[Any]]:
+    '''
+    Counts per category, difficulty and cooking_time bucket in one GROUPING
+    SETS pass over the recipes matching filter_sql (joins and WHERE without
+    the facet filters). Each facet is counted with the other facets' filters
+    only (FILTER), so a selected value does not hide its siblings' counts.
+    Returns (sql, params) yielding rows (facet, value, count); the params go
+    before those of filter_sql.
+    '''
+    grouping = f"GROUPING(r.category_id, r.difficulty, {COOKING_TIME_BUCKET_SQL})"
+    counts = []
+    params_list: List[Any] = []
+    for facet in FACETS:
+        others = [facet_filters[name] for name in FACETS if name != facet and name in facet_filters]
+        if not others:
+            counts.append("COUNT(*)")
+            continue
+        counts.append(f"COUNT(*) FILTER (WHERE {' AND '.join(sql for sql, _ in others)})")
+        for _, values in others:
+            params_list.extend(values)
+    
+    # GROUPING() sets one bit per column the row is not grouped by: 3 = category, 5 = difficulty, 6 = cooking_time
+    query = f"""
+        SELECT CASE {grouping} WHEN 3 THEN 'category' WHEN 5 THEN 'difficulty' ELSE 'cooking_time' END AS facet,
+               CASE {grouping} WHEN 3 THEN to_json(r.category_id) WHEN 5 THEN to_json(r.difficulty)
+                    ELSE to_json({COOKING_TIME_BUCKET_SQL}) END AS value,
+               CASE {grouping} WHEN 3 THEN {counts[0]} WHEN 5 THEN {counts[1]} ELSE {counts[2]} END AS count
+        FROM recipes r
+        {filter_sql}
+        GROUP BY GROUPING SETS ((r.category_id), (r.difficulty), ({COOKING_TIME_BUCKET_SQL}))
+    """
+    return query, params_list
+
+def group_facets(rows: Optional[List[List[Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    facets: Dict[str, List[Dict[str, Any]]] = {facet: [] for facet in FACETS}
+    for facet, value, count in rows or []:
+        facets[facet].append({'value': value, 'count': count})
+    for facet in ('category', 'difficulty'):
+        facets[facet].sort(key=lambda item: (-item['count'], str(item['value'])))
+    bucket_order = {label: position for position, (label, _) in enumerate(COOKING_TIME_BUCKETS)}
+    facets['cooking_time'].sort(key=lambda item: bucket_order[item['value']])
+    return facets
+
+def parse_fields(value: str) -> List[str]:
+    if value in FIELD_SETS:
+        return FIELD_SETS[value]
+    fields = ['id']
+    for field in value.split(','):
+        field = field.strip()
+        if field not in RECIPE_FIELDS:
+            raise ValueError(f'Unknown field: {field}')
+        if field not in fields:
+            fields.append(field)
+    return fields
+
+def fetch_recipes_by_id(cur, fields: List[str], recipe_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    '''The requested fields of the given recipes, keyed by id; unknown ids are left out.'''
+    if not recipe_ids:
+        return {}
+    columns = ', '.join(f"{RECIPE_FIELDS[field]} AS {field}" for field in fields)
+    query = f"SELECT {columns} FROM recipes r"
+    if 'author_name' in fields:
+        query += " LEFT JOIN users u ON r.user_id = u.id"
+    query += " WHERE r.id = ANY(%s)"
+    cur.execute(query, (list(recipe_ids),))
+    return {row['id']: dict(row) for row in cur.fetchall()}
+
+def uses_favorites_count(fields: List[str], sort: Optional[str] = None) -> bool:
+    # favorites_count changes without moving the 'recipes' catalog version (V0010),
+    # so responses that show or sort by it get no ETag and Cache-Control: no-store
+    return 'favorites_count' in fields or sort == 'popular'
+
+def parse_number(value: Optional[str], name: str) -> Optional[float]:
+    if value is None or value == '':
         return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
 
-def get_user_from_token(headers: Dict[str, str]) -> Optional[int]:
-    token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
-    if not token:
+def parse_count(value: Optional[str], name: str) -> Optional[int]:
+    if value is None or value == '':
         return None
-    
-    payload = verify_jwt(token)
-    return payload['user_id'] if payload else None
+    try:
+        count = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+    if count < 0:
+        raise ValueError(f'{name} must not be negative')
+    return count
 
+@compressed
+@cached_get('recipes', uncacheable=('updated_since', 'format'))
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     headers = event.get('headers', {})
@@ -60,7 +306,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token, If-None-Match',
                 'Access-Control-Max-Age': '86400'
             },
             'body': '',
@@ -76,29 +322,44 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             recipe_id = params.get('id')
             category = params.get('category')
             search = params.get('search')
+            ids = params.get('ids')
+            updated_since = params.get('updated_since')
+            pantry = params.get('pantry')
+            similar_to = params.get('similar_to')
+            favorited = params.get('favorited')
             user_id = get_user_from_token(headers)
             
             if recipe_id:
+                query = """
+                    SELECT r.id, r.user_id, r.title, r.description, r.image_url,
+                           r.cooking_time, r.servings, r.difficulty, r.category_id,
+                           r.instructions, r.created_at, r.updated_at,
+                           u.name as author_name,
+                           r.calories_per_serving,
+                           COALESCE(ri.ingredients, '[]'::json) AS ingredients
+                    FROM recipes r
+                    LEFT JOIN users u ON r.user_id = u.id
+                    LEFT JOIN LATERAL (
+                        SELECT json_agg(json_build_object(
+                                   'ingredient_id', i.id,
+                                   'name', i.name,
+                                   'amount', x.amount,
+                                   'unit', x.unit,
+                                   'calories_per_100g', i.calories_per_100g
+                               ) ORDER BY x.id) AS ingredients
+                        FROM recipe_ingredients x
+                        JOIN ingredients i ON i.id = x.ingredient_id
+                        WHERE x.recipe_id = r.id
+                    ) ri ON true
+                    WHERE r.id = %s
+                """
+                params_list = [recipe_id]
+                
                 if user_id:
-                    cur.execute("""
-                        SELECT r.id, r.user_id, r.title, r.description, r.image_url,
-                               r.cooking_time, r.servings, r.difficulty, r.category_id,
-                               r.instructions, r.created_at, r.updated_at,
-                               u.name as author_name
-                        FROM recipes r
-                        LEFT JOIN users u ON r.user_id = u.id
-                        WHERE r.id = %s AND (true OR r.user_id = %s)
-                    """, (recipe_id, user_id))
-                else:
-                    cur.execute("""
-                        SELECT r.id, r.user_id, r.title, r.description, r.image_url,
-                               r.cooking_time, r.servings, r.difficulty, r.category_id,
-                               r.instructions, r.created_at, r.updated_at,
-                               u.name as author_name
-                        FROM recipes r
-                        LEFT JOIN users u ON r.user_id = u.id
-                        WHERE r.id = %s
-                    """, (recipe_id,))
+                    query += " AND (true OR r.user_id = %s)"
+                    params_list.append(user_id)
+                
+                cur.execute(query, params_list)
                 recipe = cur.fetchone()
                 
                 if not recipe:
@@ -116,40 +377,365 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             
+            elif ids:
+                try:
+                    requested_ids = parse_id_list(ids, MAX_BATCH_IDS)
+                    fields = parse_fields(params.get('fields') or 'summary')
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                no_store = {'Cache-Control': 'no-store'} if uses_favorites_count(fields) else {}
+                found = fetch_recipes_by_id(cur, fields, requested_ids)
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **no_store},
+                    'body': json.dumps({
+                        'recipes': [found[recipe_id] for recipe_id in requested_ids if recipe_id in found],
+                        'missing': [recipe_id for recipe_id in requested_ids if recipe_id not in found]
+                    }, default=str),
+                    'isBase64Encoded': False
+                }
+            
+            elif favorited:
+                if not user_id:
+                    return {
+                        'statusCode': 401,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Authentication required'}),
+                        'isBase64Encoded': False
+                    }
+                
+                try:
+                    requested_ids = parse_id_list(favorited, MAX_BATCH_IDS)
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                cur.execute(
+                    "SELECT recipe_id FROM favorites WHERE user_id = %s AND recipe_id = ANY(%s)",
+                    (user_id, requested_ids)
+                )
+                found = {row['recipe_id'] for row in cur.fetchall()}
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'favorited': [recipe_id for recipe_id in requested_ids if recipe_id in found]}),
+                    'isBase64Encoded': False
+                }
+            
+            elif pantry:
+                try:
+                    pantry_ids = parse_id_list(pantry, MAX_PANTRY_IDS, 'ingredient id')
+                    max_missing = parse_count(params.get('max_missing'), 'max_missing')
+                    limit = parse_limit(params.get('limit'), DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+                    fields = parse_fields(params.get('fields') or 'summary')
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                no_store = {'Cache-Control': 'no-store'} if uses_favorites_count(fields) else {}
+                max_missing = DEFAULT_PANTRY_MISSING if max_missing is None else max_missing
+                matches = get_pantry_index(cur).match(pantry_ids, max_missing, limit)
+                
+                found = fetch_recipes_by_id(cur, fields, [recipe_id for recipe_id, _, _ in matches])
+                recipes = []
+                for recipe_id, matched, missing in matches:
+                    if recipe_id in found:
+                        found[recipe_id]['matched_ingredients'] = matched
+                        found[recipe_id]['missing_ingredients'] = missing
+                        recipes.append(found[recipe_id])
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **no_store},
+                    'body': json.dumps(recipes, default=str),
+                    'isBase64Encoded': False
+                }
+            
+            elif similar_to:
+                try:
+                    if not (similar_to.isascii() and similar_to.isdigit()):
+                        raise ValueError('similar_to must be a recipe id')
+                    similar_id = int(similar_to)
+                    limit = parse_limit(params.get('limit'), DEFAULT_SIMILAR_SIZE, MAX_PAGE_SIZE)
+                    fields = parse_fields(params.get('fields') or 'summary')
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                no_store = {'Cache-Control': 'no-store'} if uses_favorites_count(fields) else {}
+                matches = get_similarity_index(cur).similar(similar_id, limit)
+                
+                found = fetch_recipes_by_id(cur, fields, [recipe_id for recipe_id, _ in matches])
+                recipes = []
+                for recipe_id, similarity in matches:
+                    if recipe_id in found:
+                        found[recipe_id]['similarity'] = round(similarity, 3)
+                        recipes.append(found[recipe_id])
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', **no_store},
+                    'body': json.dumps(recipes, default=str),
+                    'isBase64Encoded': False
+                }
+            
+            elif updated_since:
+                try:
+                    since = parse_watermark(updated_since)
+                    limit = parse_limit(params.get('limit'), DEFAULT_SYNC_SIZE, MAX_SYNC_SIZE)
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                columns = ', '.join(f"{RECIPE_FIELDS[field]} AS {field}" for field in FIELD_SETS['full'])
+                changes = fetch_changes(
+                    cur, 'recipes',
+                    f"SELECT {columns} FROM recipes r LEFT JOIN users u ON r.user_id = u.id",
+                    'r', since, limit
+                )
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps(changes, default=str),
+                    'isBase64Encoded': False
+                }
+            
             else:
-                query = """
-                    SELECT r.id, r.user_id, r.title, r.description, r.image_url,
-                           r.cooking_time, r.servings, r.difficulty, r.category_id,
-                           r.instructions, r.created_at, r.updated_at,
-                           u.name as author_name
+                export_format = params.get('format')
+                tsquery = build_tsquery(search) if search else None
+                sort = params.get('sort') or ('relevance' if tsquery else 'newest')
+                
+                try:
+                    if export_format and export_format not in EXPORT_CONTENT_TYPES:
+                        raise ValueError('format must be json or ndjson')
+                    if sort not in RECIPE_SORTS or (sort == 'relevance' and not tsquery):
+                        raise ValueError(f'Unknown sort: {sort}')
+                    limit = parse_limit(params.get('limit'), DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+                    page_cursor = decode_cursor(params.get('cursor'), RECIPE_SORTS[sort][1])
+                    min_calories = parse_number(params.get('min_calories'), 'min_calories')
+                    max_calories = parse_number(params.get('max_calories'), 'max_calories')
+                    min_time = parse_number(params.get('min_time'), 'min_time')
+                    max_time = parse_number(params.get('max_time'), 'max_time')
+                    min_servings = parse_number(params.get('min_servings'), 'min_servings')
+                    max_servings = parse_number(params.get('max_servings'), 'max_servings')
+                    category_ids = parse_id_list(category or '', MAX_FACET_VALUES, 'category id')
+                    difficulties = parse_value_list(params.get('difficulty') or '', MAX_FACET_VALUES, 'difficulty')
+                    with_ingredients = parse_id_list(params.get('with_ingredients') or '', MAX_INGREDIENT_FILTERS, 'ingredient id')
+                    without_ingredients = parse_id_list(params.get('without_ingredients') or '', MAX_INGREDIENT_FILTERS, 'ingredient id')
+                    with_facets = params.get('facets') in ('1', 'true') and not export_format
+                    fields = parse_fields(params.get('fields') or ('full' if export_format else 'summary'))
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+                
+                etag = None if uses_favorites_count(fields, sort) else catalog_etag('recipes', get_catalog_version(cur, 'recipes'))
+                cache_headers = {'ETag': etag, 'Cache-Control': 'no-cache'} if etag else {'Cache-Control': 'no-store'}
+                
+                if etag and etag_matches(get_header(headers, 'If-None-Match'), etag):
+                    return {
+                        'statusCode': 304,
+                        'headers': {
+                            'ETag': etag,
+                            'Cache-Control': 'no-cache',
+                            'Access-Control-Allow-Origin': '*',
+                            'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor'
+                        },
+                        'body': '',
+                        'isBase64Encoded': False
+                    }
+                
+                sort_expr, sort_type, descending = RECIPE_SORTS[sort]
+                sort_direction = 'DESC' if descending else 'ASC'
+                
+                columns = ', '.join(f"{RECIPE_FIELDS[field]} AS {field}" for field in fields)
+                
+                # joins and conditions shared by the page and the facet counts
+                filter_sql = ""
+                filter_params: List[Any] = []
+                
+                # precomputed by shared.trending; recipes created after the last refresh are not ranked yet
+                if sort == 'trending':
+                    filter_sql += " JOIN recipe_trending t ON t.recipe_id = r.id"
+                
+                if tsquery:
+                    filter_sql += """
+                    CROSS JOIN (
+                        SELECT to_tsquery('russian', %s) || to_tsquery('simple', %s) AS q, lower(%s) AS term
+                    ) s
+                    """
+                    filter_params.extend([tsquery, tsquery, search])
+                
+                filter_sql += " WHERE 1=1"
+                
+                if user_id:
+                    filter_sql += " AND (true OR r.user_id = %s)"
+                    filter_params.append(user_id)
+                
+                if tsquery:
+                    filter_sql += " AND (r.search_vector @@ s.q OR s.term <%% lower(r.title))"
+                
+                if sort == 'calories':
+                    filter_sql += " AND r.calories_per_serving IS NOT NULL"
+                
+                if min_calories is not None:
+                    filter_sql += " AND r.calories_per_serving >= %s"
+                    filter_params.append(min_calories)
+                
+                if max_calories is not None:
+                    filter_sql += " AND r.calories_per_serving <= %s"
+                    filter_params.append(max_calories)
+                
+                if min_servings is not None:
+                    filter_sql += " AND r.servings >= %s"
+                    filter_params.append(min_servings)
+                
+                if max_servings is not None:
+                    filter_sql += " AND r.servings <= %s"
+                    filter_params.append(max_servings)
+                
+                if with_ingredients:
+                    filter_sql += """
+                    AND r.id IN (
+                        SELECT x.recipe_id FROM recipe_ingredients x
+                        WHERE x.ingredient_id = ANY(%s)
+                        GROUP BY x.recipe_id HAVING COUNT(*) = %s
+                    )
+                    """
+                    filter_params.extend([with_ingredients, len(with_ingredients)])
+                
+                if without_ingredients:
+                    filter_sql += """
+                    AND NOT EXISTS (
+                        SELECT 1 FROM recipe_ingredients x
+                        WHERE x.recipe_id = r.id AND x.ingredient_id = ANY(%s)
+                    )
+                    """
+                    filter_params.append(without_ingredients)
+                
+                # facet name -> (condition, params); each facet's counts leave out its own condition
+                facet_filters: Dict[str, Tuple[str, List[Any]]] = {}
+                if len(category_ids) == 1:
+                    facet_filters['category'] = ("r.category_id = %s", category_ids)
+                elif category_ids:
+                    facet_filters['category'] = ("r.category_id = ANY(%s)", [category_ids])
+                if difficulties:
+                    facet_filters['difficulty'] = ("r.difficulty = ANY(%s)", [difficulties])
+                if min_time is not None or max_time is not None:
+                    facet_filters['cooking_time'] = (
+                        "r.cooking_time BETWEEN COALESCE(%s, 0) AND COALESCE(%s, 2147483647)", [min_time, max_time]
+                    )
+                
+                query = f"""
+                    SELECT {columns}, {sort_expr} AS sort_key
                     FROM recipes r
-                    LEFT JOIN users u ON r.user_id = u.id
-                    WHERE 1=1
                 """
-                params_list = []
+                if 'author_name' in fields:
+                    query += " LEFT JOIN users u ON r.user_id = u.id"
+                query += filter_sql
+                params_list = list(filter_params)
                 
-                if user_id:
-                    query += " AND (true OR r.user_id = %s)"
-                    params_list.append(user_id)
+                for condition, values in facet_filters.values():
+                    query += f" AND {condition}"
+                    params_list.extend(values)
                 
-                if category:
-                    query += " AND r.category_id = %s"
-                    params_list.append(category)
+                if page_cursor:
+                    query += f" AND ({sort_expr}, r.id) {'<' if descending else '>'} (%s::{sort_type}, %s)"
+                    params_list.extend(page_cursor)
                 
-                if search:
-                    query += " AND (r.title ILIKE %s OR r.description ILIKE %s)"
-                    search_pattern = f"%{search}%"
-                    params_list.extend([search_pattern, search_pattern])
+                if export_format:
+                    query += f" ORDER BY {sort_expr} {sort_direction}, r.id {sort_direction} LIMIT %s"
+                    params_list.append(EXPORT_MAX_ROWS + 1)
+                    body, next_cursor = stream_rows(conn, query, params_list, export_format, EXPORT_MAX_ROWS)
+                    response_headers = {
+                        'Content-Type': EXPORT_CONTENT_TYPES[export_format],
+                        **cache_headers,
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor'
+                    }
+                    if next_cursor:
+                        response_headers['X-Next-Cursor'] = encode_cursor(next_cursor)
+                    return {
+                        'statusCode': 200,
+                        'headers': response_headers,
+                        'body': body,
+                        'isBase64Encoded': False
+                    }
                 
-                query += " ORDER BY r.created_at DESC"
+                query += f" ORDER BY {sort_expr} {sort_direction}, r.id {sort_direction} LIMIT %s"
+                params_list.append(limit + 1)
+                
+                # the facet counts ride along in the same statement: one row even when the page is empty
+                if with_facets:
+                    facets_query, facets_params = facet_counts_sql(filter_sql, facet_filters)
+                    query = f"""
+                        WITH facets AS (
+                            SELECT json_agg(json_build_array(f.facet, f.value, f.count)) AS facets
+                            FROM ({facets_query}) f
+                            WHERE f.count > 0
+                        )
+                        SELECT page.*, facets.facets
+                        FROM facets
+                        LEFT JOIN ({query}) page ON true
+                        ORDER BY page.sort_key {sort_direction}, page.id {sort_direction}
+                    """
+                    params_list = facets_params + filter_params + params_list
                 
                 cur.execute(query, params_list)
-                recipes = cur.fetchall()
+                recipes = [dict(r) for r in cur.fetchall()]
+                
+                facets = None
+                if with_facets:
+                    facets = group_facets(recipes[0]['facets'] if recipes else None)
+                    recipes = [r for r in recipes if r['id'] is not None]
+                    for r in recipes:
+                        del r['facets']
+                
+                response_headers = {
+                    'Content-Type': 'application/json',
+                    **cache_headers,
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor'
+                }
+                if len(recipes) > limit:
+                    recipes = recipes[:limit]
+                    response_headers['X-Next-Cursor'] = encode_cursor([recipes[-1]['sort_key'], recipes[-1]['id']])
+                
+                for r in recipes:
+                    del r['sort_key']
                 
                 return {
                     'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps([dict(r) for r in recipes], default=str),
+                    'headers': response_headers,
+                    'body': json.dumps({'recipes': recipes, 'facets': facets} if with_facets else recipes, default=str),
                     'isBase64Encoded': False
                 }
         
@@ -165,6 +751,65 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 }
             
             body_data = json.loads(event.get('body', '{}'))
+            action = body_data.get('action')
+            
+            if action in ('favorite', 'unfavorite'):
+                favorite_recipe_id = body_data.get('recipe_id')
+                
+                if not isinstance(favorite_recipe_id, int) or isinstance(favorite_recipe_id, bool) or not 0 < favorite_recipe_id < 2 ** 31:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'recipe_id is required'}),
+                        'isBase64Encoded': False
+                    }
+                
+                # the counter moves only when a favorites row was really added or removed
+                if action == 'favorite':
+                    cur.execute("""
+                        WITH changed AS (
+                            INSERT INTO favorites (user_id, recipe_id)
+                            SELECT %s, id FROM recipes WHERE id = %s
+                            ON CONFLICT (user_id, recipe_id) DO NOTHING
+                            RETURNING recipe_id
+                        )
+                        UPDATE recipes SET favorites_count = favorites_count + 1
+                        WHERE id IN (SELECT recipe_id FROM changed)
+                    """, (user_id, favorite_recipe_id))
+                else:
+                    cur.execute("""
+                        WITH changed AS (
+                            DELETE FROM favorites WHERE user_id = %s AND recipe_id = %s
+                            RETURNING recipe_id
+                        )
+                        UPDATE recipes SET favorites_count = GREATEST(favorites_count - 1, 0)
+                        WHERE id IN (SELECT recipe_id FROM changed)
+                    """, (user_id, favorite_recipe_id))
+                
+                cur.execute("SELECT favorites_count FROM recipes WHERE id = %s", (favorite_recipe_id,))
+                recipe = cur.fetchone()
+                
+                if not recipe:
+                    conn.rollback()
+                    return {
+                        'statusCode': 404,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Recipe not found'}),
+                        'isBase64Encoded': False
+                    }
+                
+                conn.commit()
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({
+                        'recipe_id': favorite_recipe_id,
+                        'favorited': action == 'favorite',
+                        'favorites_count': recipe['favorites_count']
+                    }),
+                    'isBase64Encoded': False
+                }
             
             required_fields = ['title', 'cooking_time', 'servings', 'difficulty', 'instructions']
             for field in required_fields:
@@ -176,6 +821,16 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'isBase64Encoded': False
                     }
             
+            try:
+                validate_ingredients(body_data.get('ingredients', []))
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': str(e)}),
+                    'isBase64Encoded': False
+                }
+            
             cur.execute("""
                 INSERT INTO recipes (user_id, title, description, image_url, cooking_time, servings, difficulty, category_id, instructions)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
@@ -195,14 +850,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             recipe = cur.fetchone()
             recipe_id = recipe['id']
             
-            ingredients = body_data.get('ingredients', [])
-            for ing in ingredients:
-                cur.execute("""
-                    INSERT INTO recipe_ingredients (recipe_id, ingredient_id, amount, unit)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (recipe_id, ingredient_id) DO UPDATE
-                    SET amount = EXCLUDED.amount, unit = EXCLUDED.unit
-                """, (recipe_id, ing['ingredient_id'], ing.get('amount', ''), ing.get('unit', '')))
+            write_recipe_ingredients(cur, recipe_id, body_data.get('ingredients', []), replace=False)
+            refresh_recipe_nutrition(cur, [recipe_id])
+            refresh_recipe_signatures(cur, [recipe_id])
             
             conn.commit()
             
@@ -254,6 +904,17 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             
+            if 'ingredients' in body_data:
+                try:
+                    validate_ingredients(body_data['ingredients'])
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': str(e)}),
+                        'isBase64Encoded': False
+                    }
+            
             cur.execute("""
                 UPDATE recipes
                 SET title = %s, description = %s, image_url = %s, cooking_time = %s,
@@ -276,13 +937,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             updated_recipe = cur.fetchone()
             
             if 'ingredients' in body_data:
-                cur.execute("DELETE FROM recipe_ingredients WHERE recipe_id = %s", (recipe_id,))
-                
-                for ing in body_data['ingredients']:
-                    cur.execute("""
-                        INSERT INTO recipe_ingredients (recipe_id, ingredient_id, amount, unit)
-                        VALUES (%s, %s, %s, %s)
-                    """, (recipe_id, ing['ingredient_id'], ing.get('amount', ''), ing.get('unit', '')))
+                write_recipe_ingredients(cur, recipe_id, body_data['ingredients'], replace=True)
+                refresh_recipe_signatures(cur, [recipe_id])
+            
+            refresh_recipe_nutrition(cur, [recipe_id])
             
             conn.commit()
             
@@ -336,6 +994,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             
             cur.execute("DELETE FROM recipe_ingredients WHERE recipe_id = %s", (recipe_id,))
             cur.execute("DELETE FROM meal_plans WHERE recipe_id = %s", (recipe_id,))
+            cur.execute("DELETE FROM favorites WHERE recipe_id = %s", (recipe_id,))
             cur.execute("DELETE FROM recipes WHERE id = %s", (recipe_id,))
             conn.commit()
             
@@ -356,4 +1015,4 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        release_db_connection(conn)
\ No newline at end of file
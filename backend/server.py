@@ -0,0 +1,171 @@
+'''
+Local server hosting every function under backend/ in one process behind
+one HTTP router (/auth, /bootstrap, /recipes, /ingredients, /meal-planner).
+Requests are turned into the same event dicts the cloud platform passes to
+handler(event, context), so the handlers run unchanged and share a single
+connection pool (shared.db) and the in-process caches from shared/.
+With --processes N the socket is bound once and N forked workers accept on
+it, each with its own --threads request threads and its own pool.
+Usage: DATABASE_URL=postgresql://... python backend/server.py [--port 8000] [--threads 16] [--processes 1]
+'''
+
+import argparse
+import base64
+import json
+import os
+import signal
+import sys
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+from shared.bootstrap import handler as bootstrap_handler
+from shared.functions import Handler, function_names, load_handler
+
+def canonical_header(name: str) -> str:
+    return '-'.join(part.capitalize() for part in name.split('-'))
+
+def build_event(method: str, path: str, headers: Dict[str, str], body: bytes, client_ip: str) -> Dict[str, Any]:
+    url = urlsplit(path)
+    try:
+        text, is_base64 = body.decode('utf-8'), False
+    except UnicodeDecodeError:
+        text, is_base64 = base64.b64encode(body).decode(), True
+    return {
+        'httpMethod': method,
+        'path': url.path,
+        'headers': {canonical_header(key): value for key, value in headers.items()},
+        'queryStringParameters': dict(parse_qsl(url.query, keep_blank_values=True)),
+        'body': text,
+        'isBase64Encoded': is_base64,
+        'requestContext': {'requestId': str(uuid.uuid4()), 'identity': {'sourceIp': client_ip}},
+    }
+
+class FunctionRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # idle keep-alive connections give their worker thread back after this
+    timeout = 15
+    handlers: Dict[str, Handler] = {}
+    verbose = False
+    
+    def do_GET(self) -> None:
+        self.dispatch()
+    
+    do_POST = do_PUT = do_DELETE = do_OPTIONS = do_GET
+    
+    def dispatch(self) -> None:
+        name = urlsplit(self.path).path.strip('/').split('/', 1)[0]
+        handler = self.handlers.get(name)
+        if handler is None:
+            self.send(404, {'Content-Type': 'application/json'}, json.dumps({'error': f'Unknown function: {name}'}).encode())
+            return
+        
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        event = build_event(self.command, self.path, dict(self.headers.items()), body, self.client_address[0])
+        context = SimpleNamespace(request_id=event['requestContext']['requestId'], function_name=name)
+        try:
+            response = handler(event, context)
+        except Exception:
+            traceback.print_exc()
+            self.send(500, {'Content-Type': 'application/json'}, json.dumps({'error': 'Internal server error'}).encode())
+            return
+        
+        payload = response.get('body') or ''
+        data = base64.b64decode(payload) if response.get('isBase64Encoded') else payload.encode()
+        self.send(response.get('statusCode', 200), response.get('headers') or {}, data)
+    
+    def send(self, status: int, headers: Dict[str, str], data: bytes) -> None:
+        self.send_response(status)
+        for key, value in headers.items():
+            if key.lower() != 'content-length':
+                self.send_header(key, str(value))
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.verbose:
+            super().log_message(format, *args)
+
+class ThreadPoolHTTPServer(HTTPServer):
+    '''
+    HTTPServer that serves connections on a fixed number of threads instead
+    of one new thread per connection, so concurrency (and with it the number
+    of pooled database connections in use) stays bounded.
+    '''
+    
+    def __init__(self, address: Tuple[str, int], handler_class: Any, threads: int):
+        super().__init__(address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+    
+    def process_request(self, request, client_address) -> None:
+        self.executor.submit(self.process_request_thread, request, client_address)
+    
+    def process_request_thread(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+def serve(server: ThreadPoolHTTPServer, processes: int) -> None:
+    if processes <= 1:
+        server.serve_forever()
+        return
+    
+    # the pools and caches are created lazily, so every worker starts empty
+    children: List[int] = []
+    for _ in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            server.serve_forever()
+            os._exit(0)
+        children.append(pid)
+    
+    def stop(signum, frame) -> None:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve all backend functions from one process')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--threads', type=int, default=16, help='request threads per process')
+    parser.add_argument('--processes', type=int, default=1, help='forked worker processes sharing the socket')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+    
+    # one pooled connection per request thread unless configured otherwise
+    os.environ.setdefault('DB_POOL_MAX_SIZE', str(args.threads))
+    
+    FunctionRequestHandler.handlers = {name: load_handler(name) for name in function_names()}
+    FunctionRequestHandler.handlers['bootstrap'] = bootstrap_handler
+    FunctionRequestHandler.verbose = args.verbose
+    server = ThreadPoolHTTPServer((args.host, args.port), FunctionRequestHandler, args.threads)
+    print(f"serving {', '.join('/' + name for name in FunctionRequestHandler.handlers)} on "
+          f"http://{args.host}:{args.port} with {args.processes} process(es) x {args.threads} threads", flush=True)
+    try:
+        serve(server, args.processes)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+'''
+Code shared by the backend functions (auth, recipes, ingredients, meal-planner).
+Each function adds backend/ to sys.path and imports from here, so this
+directory has to be shipped next to every function that uses it.
+'''
@@ -0,0 +1,129 @@
+'''
+JWT issuing and verification shared by all functions, with a bounded LRU of
+already verified tokens (entries expire together with the token) and a
+short-lived cache of user rows for the auth verify action.
+'''
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', '1024'))
+USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', '1024'))
+USER_CACHE_TTL = float(os.environ.get('AUTH_USER_CACHE_TTL', '30'))
+TOKEN_LIFETIME = 7 * 24 * 3600
+
+class ExpiringLRU:
+    '''
+    LRU mapping where every entry carries its own expiry (unix time).
+    Expired entries are dropped when they are read.
+    '''
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+_secret: Optional[bytes] = None
+_verified_tokens = ExpiringLRU(TOKEN_CACHE_SIZE)
+_users = ExpiringLRU(USER_CACHE_SIZE)
+
+def get_secret() -> bytes:
+    global _secret
+    if _secret is None:
+        _secret = os.environ.get('JWT_SECRET', 'default-secret-key-change-in-production').encode()
+    return _secret
+
+def b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def sign(header: str, payload: str) -> str:
+    return b64encode(hmac.new(get_secret(), f"{header}.{payload}".encode(), hashlib.sha256).digest())
+
+def create_jwt(user_id: int, email: str) -> str:
+    exp = int(time.time()) + TOKEN_LIFETIME
+    header = b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = b64encode(json.dumps({"user_id": user_id, "email": email, "exp": exp}).encode())
+    return f"{header}.{payload}.{sign(header, payload)}"
+
+def verify_jwt(token: str) -> Optional[Dict[str, Any]]:
+    cached = _verified_tokens.get(token)
+    if cached is not None:
+        return cached
+    
+    try:
+        parts = token.split('.')
+        if len(parts) != 3:
+            return None
+        
+        header, payload, signature = parts
+        
+        if not hmac.compare_digest(signature, sign(header, payload)):
+            return None
+        
+        payload_data = json.loads(base64.urlsafe_b64decode(payload + '=='))
+        
+        if payload_data['exp'] < int(time.time()):
+            return None
+    except Exception:
+        return None
+    
+    _verified_tokens.set(token, payload_data, payload_data['exp'])
+    return payload_data
+
+def get_user_from_token(headers: Dict[str, str]) -> Optional[int]:
+    token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
+    if not token:
+        return None
+    
+    payload = verify_jwt(token)
+    return payload['user_id'] if payload else None
+
+def get_cached_user(cur, user_id: int) -> Optional[Dict[str, Any]]:
+    user = _users.get(user_id)
+    if user is not None:
+        return user
+    
+    cur.execute("SELECT id, email, name FROM users WHERE id = %s", (user_id,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    
+    user = {'id': row['id'], 'email': row['email'], 'name': row['name']}
+    _users.set(user_id, user, time.time() + USER_CACHE_TTL)
+    return user
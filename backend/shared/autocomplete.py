@@ -0,0 +1,99 @@
+'''
+In-process prefix index over ingredients.name for the ingredient picker's
+autocomplete. Names are normalized (lowercase, ё -> е, single spaces) and
+kept as sorted keys, so the matches of a prefix are a contiguous run found
+by bisection and the first k of it are the answer: whole-name prefixes
+first, then names where a later word starts with the prefix. The index is
+loaded lazily on the first autocomplete request and rebuilt when the
+'ingredients' catalog version moves; the ingredients function also
+rebuilds it right after its own writes. SQL fallbacks match against
+normalize_ingredient_name(name) (V0013), the same normalization in SQL;
+lower() rather than casefold() keeps the two identical.
+'''
+
+import re
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import psycopg2
+
+from shared.catalog import get_catalog_version
+
+WORD_RE = re.compile(r'\w+')
+
+def normalize_name(value: str) -> str:
+    return ' '.join(value.lower().replace('ё', 'е').split())
+
+def like_pattern(value: str) -> str:
+    '''Substring LIKE pattern for a normalized value, with wildcards escaped.'''
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+class NameIndex:
+    def __init__(self, rows: Iterable[Dict[str, Any]], version: int = 0):
+        self.version = version
+        self.rows = sorted(rows, key=lambda row: (normalize_name(row['name']), row['id']))
+        name_keys: List[Tuple[str, int]] = []
+        word_keys: List[Tuple[str, int]] = []
+        for position, row in enumerate(self.rows):
+            key = normalize_name(row['name'])
+            name_keys.append((key, position))
+            for word in WORD_RE.finditer(key):
+                if word.start() > 0:
+                    word_keys.append((key[word.start():], position))
+        word_keys.sort()
+        self.name_keys = [key for key, _ in name_keys]
+        self.name_positions = [position for _, position in name_keys]
+        self.word_keys = [key for key, _ in word_keys]
+        self.word_positions = [position for _, position in word_keys]
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def complete(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        prefix = normalize_name(prefix)
+        if not prefix or limit < 1:
+            return []
+        seen = set()
+        matches = []
+        for keys, positions in ((self.name_keys, self.name_positions), (self.word_keys, self.word_positions)):
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and len(matches) < limit and keys[i].startswith(prefix):
+                position = positions[i]
+                if position not in seen:
+                    seen.add(position)
+                    matches.append(self.rows[position])
+                i += 1
+        return matches
+
+_index: Optional[NameIndex] = None
+_index_lock = threading.Lock()
+
+def load_name_index(cur, version: int) -> NameIndex:
+    cur.execute("SELECT id, name, unit, calories_per_100g FROM ingredients")
+    return NameIndex((dict(row) for row in cur.fetchall()), version)
+
+def get_name_index(cur) -> NameIndex:
+    global _index
+    version = get_catalog_version(cur, 'ingredients')
+    if _index is not None and _index.version == version:
+        return _index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = load_name_index(cur, version)
+        return _index
+
+def refresh_name_index(cur) -> None:
+    '''
+    Rebuilds an already loaded index after a committed ingredients write.
+    The write has been committed, so a failure here is only logged: the
+    index keeps its old version and the next autocomplete request reloads it.
+    '''
+    if _index is None:
+        return
+    try:
+        get_name_index(cur)
+    except psycopg2.Error as e:
+        cur.connection.rollback()
+        print(f'ingredient name index refresh failed: {e}', flush=True)
@@ -0,0 +1,122 @@
+'''
+Initial page payload in one request (GET /bootstrap on the local server):
+current user, recipe list, ingredient list and meal plans as
+{user, recipes, ingredients, meal_plans, recipes_next_cursor, errors}.
+The sections are the responses of the auth, recipes, ingredients and
+meal-planner handlers, run concurrently in-process. It is a route of
+backend/server.py only, not a cloud function: each function is deployed
+from its own directory, so the handlers it calls would not be packaged
+with it, and the frontend keeps calling the four functions directly.
+'''
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+from shared.functions import load_handler
+from shared.http import compressed, get_header
+
+BOOTSTRAP_WORKERS = int(os.environ.get('BOOTSTRAP_WORKERS', '4'))
+
+# query parameters forwarded to each section's function
+RECIPE_PARAMS = (
+    'category', 'search', 'sort', 'fields', 'limit', 'min_calories', 'max_calories', 'difficulty',
+    'min_time', 'max_time', 'min_servings', 'max_servings', 'with_ingredients', 'without_ingredients'
+)
+MEAL_PLAN_PARAMS = ('start_date', 'end_date')
+
+_executor = ThreadPoolExecutor(max_workers=BOOTSTRAP_WORKERS, thread_name_prefix='bootstrap')
+
+def section_events(params: Dict[str, str], token: Optional[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    auth_headers = {'X-Auth-Token': token} if token else {}
+    events = {
+        'recipes': ('recipes', {
+            'httpMethod': 'GET',
+            'headers': auth_headers,
+            'queryStringParameters': {key: params[key] for key in RECIPE_PARAMS if params.get(key)}
+        }),
+        'ingredients': ('ingredients', {'httpMethod': 'GET', 'headers': {}, 'queryStringParameters': {}}),
+    }
+    if token:
+        events['user'] = ('auth', {
+            'httpMethod': 'POST',
+            'headers': {},
+            'body': json.dumps({'action': 'verify', 'token': token})
+        })
+        events['meal_plans'] = ('meal-planner', {
+            'httpMethod': 'GET',
+            'headers': auth_headers,
+            'queryStringParameters': {key: params[key] for key in MEAL_PLAN_PARAMS if params.get(key)}
+        })
+    return events
+
+def call_section(function: str, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    return load_handler(function)(event, context)
+
+@compressed
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+    
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+    
+    if method != 'GET':
+        return {
+            'statusCode': 405,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Method not allowed'}),
+            'isBase64Encoded': False
+        }
+    
+    params = event.get('queryStringParameters') or {}
+    token = get_header(event.get('headers'), 'X-Auth-Token')
+    
+    # every section runs on its own pooled connection, so the whole request
+    # takes as long as the slowest section rather than the sum of them
+    futures = {
+        section: _executor.submit(call_section, function, section_event, context)
+        for section, (function, section_event) in section_events(params, token).items()
+    }
+    
+    parts = []
+    errors = {}
+    next_cursor = None
+    for section in ('user', 'recipes', 'ingredients', 'meal_plans'):
+        future = futures.get(section)
+        try:
+            response = future.result() if future else None
+        except Exception:
+            # one failing section must not take down the whole page
+            response = {'statusCode': 500}
+        if response is None or response.get('statusCode') != 200:
+            if response is not None:
+                errors[section] = response.get('statusCode')
+            parts.append(f'"{section}": null')
+            continue
+        body = response['body']
+        if section == 'user':
+            body = json.dumps(json.loads(body)['user'])
+        if section == 'recipes':
+            next_cursor = get_header(response.get('headers'), 'X-Next-Cursor')
+        # section bodies are already JSON, they are spliced in without re-encoding
+        parts.append(f'"{section}": {body}')
+    parts.append(f'"recipes_next_cursor": {json.dumps(next_cursor)}')
+    parts.append(f'"errors": {json.dumps(errors)}')
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Cache-Control': 'no-store'},
+        'body': '{' + ', '.join(parts) + '}',
+        'isBase64Encoded': False
+    }
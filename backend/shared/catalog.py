@@ -0,0 +1,38 @@
+'''
+Catalog version counters (table catalog_versions), bumped by triggers on
+every write to recipes/recipe_ingredients ('recipes'), ingredients
+('ingredients') and recipe_ingredients alone ('recipe_ingredients').
+Updates of recipes.favorites_count alone do not bump 'recipes' (V0010).
+Reading one is a primary-key lookup, which makes it a cheap validator for
+HTTP caching and for in-process caches.
+
+In-process indexes over recipe ingredients refresh incrementally from
+recipe_ingredient_changes (V0008): each recipe whose ingredient set changed
+carries the id of the last transaction that changed it. An index keeps the
+database snapshot it was refreshed at and re-reads only recipes changed by
+transactions not visible in that snapshot, so a long transaction that
+commits late is still picked up.
+'''
+
+from typing import List
+
+def get_catalog_version(cur, name: str) -> int:
+    cur.execute("SELECT version FROM catalog_versions WHERE name = %s", (name,))
+    row = cur.fetchone()
+    return row['version'] if row else 0
+
+def catalog_etag(name: str, version: int) -> str:
+    return f'W/"{name}-{version}"'
+
+def current_snapshot(cur) -> str:
+    cur.execute("SELECT pg_current_snapshot()::text AS snapshot")
+    return cur.fetchone()['snapshot']
+
+def changed_recipe_ids(cur, snapshot: str) -> List[int]:
+    '''Recipes whose ingredient set changed in transactions not visible in the snapshot.'''
+    cur.execute("""
+        SELECT recipe_id FROM recipe_ingredient_changes
+        WHERE txid >= pg_snapshot_xmin(%s::pg_snapshot)
+          AND NOT pg_visible_in_snapshot(txid, %s::pg_snapshot)
+    """, (snapshot, snapshot))
+    return [row['recipe_id'] for row in cur.fetchall()]
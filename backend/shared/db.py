@@ -0,0 +1,102 @@
+'''
+Connection pool shared by all functions that run in one process: each cloud
+function instance gets its own, and the local server (backend/server.py)
+hosting every handler in one process shares a single pool among them.
+'''
+
+import os
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '4'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+DB_POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', '30'))
+
+class ConnectionPool:
+    '''
+    Keeps connections open between warm invocations of the function.
+    Idle connections are health-checked on checkout (a cheap status check,
+    plus SELECT 1 once they have been idle longer than ping_after seconds),
+    broken ones are dropped and replaced by a fresh connect.
+    '''
+    
+    def __init__(self, dsn: str, max_size: int, timeout: float, ping_after: float):
+        self.dsn = dsn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle: List[Tuple[Any, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(max_size, 1))
+    
+    def _is_healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed or conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+    
+    def _discard(self, conn) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+    
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise psycopg2.pool.PoolError('connection pool exhausted')
+        try:
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+                if item is None:
+                    return psycopg2.connect(self.dsn)
+                conn, idle_since = item
+                if self._is_healthy(conn, idle_since):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def putconn(self, conn) -> None:
+        try:
+            if conn.closed:
+                return
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+_db_pool: Optional[ConnectionPool] = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool() -> ConnectionPool:
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = ConnectionPool(os.environ['DATABASE_URL'], DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_PING_AFTER)
+    return _db_pool
+
+def get_db_connection():
+    return get_db_pool().getconn()
+
+def release_db_connection(conn) -> None:
+    get_db_pool().putconn(conn)
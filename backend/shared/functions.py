@@ -0,0 +1,38 @@
+'''
+Loads another function's handler from backend/<name>/index.py so it can be
+called in-process (the local server and its /bootstrap route). Each module
+is loaded once per process and registered in sys.modules.
+'''
+
+import importlib.util
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Handler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+_load_lock = threading.Lock()
+
+def function_names() -> List[str]:
+    return sorted(
+        name for name in os.listdir(BACKEND_DIR)
+        if os.path.isfile(os.path.join(BACKEND_DIR, name, 'index.py'))
+    )
+
+def load_handler(name: str) -> Handler:
+    module_name = f'{name.replace("-", "_")}_index'
+    with _load_lock:
+        module = sys.modules.get(module_name)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(module_name, os.path.join(BACKEND_DIR, name, 'index.py'))
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            try:
+                spec.loader.exec_module(module)
+            except Exception:
+                del sys.modules[module_name]
+                raise
+    return module.handler
@@ -0,0 +1,100 @@
+'''
+Request/response helpers shared by the functions: header lookup, ETag
+matching and negotiated compression of large response bodies.
+'''
+
+import base64
+import functools
+import gzip
+import os
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+
+def get_header(headers: Optional[Dict[str, str]], name: str) -> Optional[str]:
+    if not headers:
+        return None
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    '''The supported encoding with the highest q-value; br wins a tie with gzip.'''
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get('*', 0.0)
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+    # max() keeps the first of equal qualities, so the order above breaks ties
+    best = max(supported, key=lambda name: accepted.get(name, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def compress_response(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    body = response.get('body')
+    if response.get('isBase64Encoded') or not isinstance(body, str) or len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    
+    headers = dict(response.get('headers') or {})
+    headers['Vary'] = 'Accept-Encoding'
+    encoding = choose_encoding(get_header(event.get('headers'), 'Accept-Encoding'))
+    data = body.encode()
+    
+    if encoding is None or len(data) < COMPRESSION_MIN_BYTES:
+        return {**response, 'headers': headers}
+    
+    headers['Content-Encoding'] = encoding
+    return {
+        **response,
+        'headers': headers,
+        'body': base64.b64encode(compress_body(data, encoding)).decode(),
+        'isBase64Encoded': True
+    }
+
+def compressed(handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    '''
+    Wraps a function handler so that bodies of at least COMPRESSION_MIN_BYTES
+    are returned gzip- or brotli-encoded (base64) when the client accepts it.
+    '''
+    @functools.wraps(handler)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        return compress_response(event, handler(event, context))
+    return wrapper
@@ -0,0 +1,27 @@
+'''
+Precomputed calorie totals of recipes (recipes.total_calories and
+calories_per_serving). The per-row formula is the SQL function
+recipe_ingredient_calories() from V0005: only mass and volume units
+convert to grams, pieces and other units count as unknown.
+'''
+
+from typing import Any, List
+
+def refresh_recipe_nutrition(cur, recipe_ids: List[Any]) -> None:
+    '''Recomputes the totals of the given recipes from their current ingredients.'''
+    if not recipe_ids:
+        return
+    cur.execute("""
+        UPDATE recipes r
+        SET total_calories = n.total_calories,
+            calories_per_serving = ROUND(n.total_calories / NULLIF(r.servings, 0), 1)
+        FROM (
+            SELECT rid.id AS recipe_id,
+                   SUM(recipe_ingredient_calories(x.amount, x.unit, i.calories_per_100g)) AS total_calories
+            FROM unnest(%s::int[]) AS rid(id)
+            LEFT JOIN recipe_ingredients x ON x.recipe_id = rid.id
+            LEFT JOIN ingredients i ON i.id = x.ingredient_id
+            GROUP BY rid.id
+        ) n
+        WHERE r.id = n.recipe_id
+    """, ([int(recipe_id) for recipe_id in recipe_ids],))
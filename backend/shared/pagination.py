@@ -0,0 +1,57 @@
+'''
+Keyset pagination helpers shared by the list handlers: the limit
+parameter and opaque cursor tokens over (sort key, id) of the last row
+on a page. A decoded sort key is converted for the SQL type it is cast
+to, so a forged token fails as ValueError (400) rather than in SQL.
+'''
+
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional
+
+# SQL type of a sort key -> conversion of its value in a cursor token
+CURSOR_KEY_TYPES = {
+    'text': str,
+    'timestamp': datetime.fromisoformat,
+    'float8': float,
+    'numeric': lambda value: Decimal(str(value)),
+    'int': int,
+}
+
+def parse_limit(value: Optional[str], default: int, maximum: int) -> int:
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode().rstrip('=')
+
+def decode_cursor(token: Optional[str], sort_type: str) -> Optional[List[Any]]:
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError('Invalid cursor')
+    sort_key, last_id = values
+    if isinstance(last_id, bool) or not isinstance(last_id, int) or isinstance(sort_key, (bool, list, dict)):
+        raise ValueError('Invalid cursor')
+    if sort_type == 'text' and not isinstance(sort_key, str):
+        raise ValueError('Invalid cursor')
+    try:
+        sort_key = CURSOR_KEY_TYPES[sort_type](sort_key)
+    except (TypeError, ValueError, ArithmeticError):
+        raise ValueError('Invalid cursor')
+    if sort_type == 'int' and not -2 ** 31 <= sort_key < 2 ** 31:
+        raise ValueError('Invalid cursor')
+    return [sort_key, last_id]
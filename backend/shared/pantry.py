@@ -0,0 +1,227 @@
+'''
+In-process inverted index ingredient_id -> recipes for the "what can I
+cook" query. Recipes are numbered densely in id order; an ingredient used
+by many recipes keeps its posting as a bitset (a Python int), a rare one as
+a sorted array of positions. Matching adds the pantry's postings into a
+bit-sliced counter (one bitset per binary digit of the per-recipe match
+count), so the work is a few big-int operations per pantry ingredient
+rather than per recipe. The index is loaded lazily on the first pantry
+request. When the 'recipe_ingredients' catalog version moves, only the
+recipes whose ingredient sets changed since the last refresh are re-read
+(see shared.catalog) and their postings updated in place, under the
+index's own lock.
+'''
+
+import threading
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from shared.catalog import changed_recipe_ids, current_snapshot, get_catalog_version
+
+# a bitset costs n/8 bytes, a position array 4 bytes per recipe
+DENSE_POSTING_RATIO = 32
+
+def to_bitset(positions: Iterable[int], size: int) -> int:
+    buf = bytearray((size + 7) // 8)
+    for position in positions:
+        buf[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buf, 'little')
+
+class PantryIndex:
+    def __init__(self, postings: Dict[int, Iterable[int]], version: int = 0):
+        self.version = version
+        self.snapshot: Optional[str] = None
+        self.lock = threading.Lock()
+        recipes: Dict[int, List[int]] = {}
+        for ingredient_id, recipe_ids in postings.items():
+            for recipe_id in set(recipe_ids):
+                recipes.setdefault(recipe_id, []).append(ingredient_id)
+        self._build(recipes)
+    
+    def _build(self, recipes: Dict[int, Iterable[int]]) -> None:
+        self.ingredients = {recipe_id: array('I', sorted(set(ingredient_ids)))
+                            for recipe_id, ingredient_ids in recipes.items() if ingredient_ids}
+        self.recipe_ids = array('I', sorted(self.ingredients))
+        self.positions = {recipe_id: pos for pos, recipe_id in enumerate(self.recipe_ids)}
+        count = len(self.recipe_ids)
+        
+        postings: Dict[int, List[int]] = {}
+        for pos, recipe_id in enumerate(self.recipe_ids):
+            for ingredient_id in self.ingredients[recipe_id]:
+                postings.setdefault(ingredient_id, []).append(pos)
+        self.postings: Dict[int, Union[int, array]] = {}
+        for ingredient_id, positions in postings.items():
+            if len(positions) * DENSE_POSTING_RATIO > count:
+                self.postings[ingredient_id] = to_bitset(positions, count)
+            else:
+                self.postings[ingredient_id] = array('I', positions)
+        
+        # number of distinct ingredients -> bitset of recipes with that many
+        by_size: Dict[int, List[int]] = {}
+        for pos, recipe_id in enumerate(self.recipe_ids):
+            by_size.setdefault(len(self.ingredients[recipe_id]), []).append(pos)
+        self.by_size = {size: to_bitset(positions, count) for size, positions in by_size.items()}
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, List[int]]], version: int = 0) -> 'PantryIndex':
+        return cls(dict(rows), version)
+    
+    def _add_posting(self, ingredient_id: int, pos: int) -> None:
+        posting = self.postings.get(ingredient_id)
+        if posting is None:
+            self.postings[ingredient_id] = array('I', [pos])
+        elif isinstance(posting, int):
+            self.postings[ingredient_id] = posting | 1 << pos
+        else:
+            insort(posting, pos)
+            if len(posting) * DENSE_POSTING_RATIO > self.recipe_count:
+                self.postings[ingredient_id] = to_bitset(posting, self.recipe_count)
+    
+    def _remove_posting(self, ingredient_id: int, pos: int) -> None:
+        posting = self.postings[ingredient_id]
+        if isinstance(posting, int):
+            posting &= ~(1 << pos)
+        else:
+            del posting[bisect_left(posting, pos)]
+        if posting:
+            self.postings[ingredient_id] = posting
+        else:
+            del self.postings[ingredient_id]
+    
+    def _move_size(self, pos: int, old_size: int, new_size: int) -> None:
+        if old_size:
+            bits = self.by_size[old_size] & ~(1 << pos)
+            if bits:
+                self.by_size[old_size] = bits
+            else:
+                del self.by_size[old_size]
+        if new_size:
+            self.by_size[new_size] = self.by_size.get(new_size, 0) | 1 << pos
+    
+    def apply(self, changes: Dict[int, List[int]]) -> None:
+        '''
+        Replaces the ingredient sets of the given recipes; an empty list
+        removes the recipe. A removed recipe leaves its position unused. A
+        new recipe is appended, and only one whose id sorts before existing
+        recipes (a serial id committed out of order) renumbers the index.
+        '''
+        with self.lock:
+            last_id = self.recipe_ids[-1] if self.recipe_ids else 0
+            if any(recipe_id not in self.positions and recipe_id < last_id and ingredient_ids
+                   for recipe_id, ingredient_ids in changes.items()):
+                recipes: Dict[int, Iterable[int]] = dict(self.ingredients)
+                recipes.update(changes)
+                self._build(recipes)
+                return
+            
+            for recipe_id, ingredient_ids in sorted(changes.items()):
+                new = set(ingredient_ids)
+                old = set(self.ingredients.get(recipe_id, ()))
+                if new == old:
+                    continue
+                pos = self.positions.get(recipe_id)
+                if pos is None:
+                    pos = self.positions[recipe_id] = len(self.recipe_ids)
+                    self.recipe_ids.append(recipe_id)
+                for ingredient_id in old - new:
+                    self._remove_posting(ingredient_id, pos)
+                for ingredient_id in new - old:
+                    self._add_posting(ingredient_id, pos)
+                self._move_size(pos, len(old), len(new))
+                if new:
+                    self.ingredients[recipe_id] = array('I', sorted(new))
+                else:
+                    del self.ingredients[recipe_id]
+    
+    @property
+    def recipe_count(self) -> int:
+        return len(self.recipe_ids)
+    
+    def match(self, pantry: Iterable[int], max_missing: int, limit: int) -> List[Tuple[int, int, int]]:
+        '''
+        Recipes sharing at least one ingredient with the pantry and missing
+        at most max_missing, as (recipe_id, matched, missing) ordered by
+        missing ascending, then matched descending, then id.
+        '''
+        with self.lock:
+            # no recipe can miss more ingredients than the largest recipe has
+            max_missing = min(max_missing, max(self.by_size, default=0))
+            planes: List[int] = []
+            for ingredient_id in set(pantry):
+                posting = self.postings.get(ingredient_id)
+                if posting is None:
+                    continue
+                bits = posting if isinstance(posting, int) else to_bitset(posting, self.recipe_count)
+                for digit, plane in enumerate(planes):
+                    carry = plane & bits
+                    planes[digit] = plane ^ bits
+                    bits = carry
+                    if not bits:
+                        break
+                if bits:
+                    planes.append(bits)
+            
+            results: List[Tuple[int, int, int]] = []
+            for missing in range(max_missing + 1):
+                for size in sorted(self.by_size, reverse=True):
+                    matched = size - missing
+                    if matched < 1 or matched >> len(planes):
+                        continue
+                    bits = self.by_size[size]
+                    for digit, plane in enumerate(planes):
+                        bits = bits & plane if matched >> digit & 1 else bits & ~plane
+                        if not bits:
+                            break
+                    while bits:
+                        lowest = bits & -bits
+                        results.append((self.recipe_ids[lowest.bit_length() - 1], matched, missing))
+                        if len(results) == limit:
+                            return results
+                        bits ^= lowest
+            return results
+
+_index: Optional[PantryIndex] = None
+_index_lock = threading.Lock()
+
+def load_pantry_index(cur, version: int) -> PantryIndex:
+    cur.execute("""
+        SELECT ingredient_id, array_agg(recipe_id) AS recipe_ids
+        FROM recipe_ingredients
+        WHERE ingredient_id IS NOT NULL AND recipe_id IS NOT NULL
+        GROUP BY ingredient_id
+    """)
+    return PantryIndex.from_rows(((row['ingredient_id'], row['recipe_ids']) for row in cur.fetchall()), version)
+
+def load_recipe_ingredients(cur, recipe_ids: List[int]) -> Dict[int, List[int]]:
+    '''Current ingredient sets of the given recipes; an empty list for a recipe that has none.'''
+    changes: Dict[int, List[int]] = {recipe_id: [] for recipe_id in recipe_ids}
+    if recipe_ids:
+        cur.execute("""
+            SELECT recipe_id, array_agg(ingredient_id) AS ingredient_ids
+            FROM recipe_ingredients
+            WHERE recipe_id = ANY(%s) AND ingredient_id IS NOT NULL
+            GROUP BY recipe_id
+        """, (recipe_ids,))
+        for row in cur.fetchall():
+            changes[row['recipe_id']] = row['ingredient_ids']
+    return changes
+
+def get_pantry_index(cur) -> PantryIndex:
+    global _index
+    version = get_catalog_version(cur, 'recipe_ingredients')
+    if _index is not None and _index.version == version:
+        return _index
+    with _index_lock:
+        if _index is not None and _index.version == version:
+            return _index
+        
+        # taken before the reads below, so a change they miss is re-read next time
+        snapshot = current_snapshot(cur)
+        if _index is None:
+            _index = load_pantry_index(cur, version)
+        else:
+            _index.apply(load_recipe_ingredients(cur, changed_recipe_ids(cur, _index.snapshot)))
+            _index.version = version
+        _index.snapshot = snapshot
+        return _index
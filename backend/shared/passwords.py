@@ -0,0 +1,123 @@
+'''
+Salted password hashing (scrypt, PBKDF2 where scrypt is unavailable) with a
+configurable cost. Hashing runs in a bounded worker pool: when every worker
+is busy and the wait queue is full, calls fail fast with PasswordHasherBusy
+instead of letting a login burst starve the rest of the process.
+Legacy unsalted SHA-256 hex digests still verify and report needs_rehash.
+'''
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
+
+SCRYPT_LOG_N = int(os.environ.get('PASSWORD_SCRYPT_LOG_N', '14'))
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', '600000'))
+HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', str(HASH_WORKERS * 4)))
+HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '10'))
+SALT_BYTES = 16
+
+class PasswordHasherBusy(Exception):
+    pass
+
+def b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+def scrypt(password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+    n = 1 << log_n
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32)
+
+def _hash(password: str, log_n: int) -> str:
+    salt = os.urandom(SALT_BYTES)
+    if hasattr(hashlib, 'scrypt'):
+        digest = scrypt(password, salt, log_n, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${log_n}${SCRYPT_R}${SCRYPT_P}${b64encode(salt)}${b64encode(digest)}"
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${b64encode(salt)}${b64encode(digest)}"
+
+def _verify(password: str, stored: str) -> bool:
+    parts = stored.split('$')
+    # a malformed or truncated stored hash fails the login instead of raising
+    # (binascii.Error from b64decode is a ValueError)
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            log_n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = scrypt(password, base64.b64decode(parts[4], validate=True), log_n, r, p)
+            return hmac.compare_digest(digest, base64.b64decode(parts[5], validate=True))
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            digest = hashlib.pbkdf2_hmac('sha256', password.encode(), base64.b64decode(parts[2], validate=True), int(parts[1]))
+            return hmac.compare_digest(digest, base64.b64decode(parts[3], validate=True))
+    except (ValueError, OverflowError, MemoryError):
+        return False
+    if len(stored) == 64:
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+    return False
+
+def needs_rehash(stored: str) -> bool:
+    parts = stored.split('$')
+    if parts[0] == 'scrypt':
+        return not hasattr(hashlib, 'scrypt') or parts[1:4] != [str(SCRYPT_LOG_N), str(SCRYPT_R), str(SCRYPT_P)]
+    if parts[0] == 'pbkdf2_sha256':
+        return hasattr(hashlib, 'scrypt') or parts[1] != str(PBKDF2_ITERATIONS)
+    return True
+
+class BoundedHasher:
+    '''
+    Runs hashing jobs on at most `workers` threads (hashlib releases the GIL
+    while hashing) and admits at most `queue_limit` more jobs waiting. A call
+    that waits longer than `timeout` raises PasswordHasherBusy; its job keeps
+    its admission slot until it finishes or is cancelled from the queue.
+    '''
+    
+    def __init__(self, workers: int, queue_limit: int, timeout: float):
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers = max(workers, 1)
+        self._admitted = threading.BoundedSemaphore(self._workers + max(queue_limit, 0))
+        self._lock = threading.Lock()
+    
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._admitted.acquire(blocking=False):
+            raise PasswordHasherBusy('Too many concurrent password operations')
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._admitted.release()
+            raise
+        # the slot stays taken until the job is done, even after the caller gives up waiting
+        future.add_done_callback(lambda _: self._admitted.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy('Password operation timed out')
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='password-hash')
+        return self._executor
+
+_hasher = BoundedHasher(HASH_WORKERS, HASH_QUEUE_LIMIT, HASH_TIMEOUT)
+
+def hash_password(password: str) -> str:
+    return _hasher.run(_hash, password, SCRYPT_LOG_N)
+
+def verify_password(password: str, stored: str) -> bool:
+    return _hasher.run(_verify, password, stored)
+
+_dummy_hash: Optional[str] = None
+
+def verify_dummy_password(password: str) -> None:
+    '''Costs what verify_password costs, for logins with an unknown email.'''
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = _hasher.run(_hash, os.urandom(SALT_BYTES).hex(), SCRYPT_LOG_N)
+    _hasher.run(_verify, password, _dummy_hash)
@@ -0,0 +1,186 @@
+'''
+Read-through cache of serialized GET responses for anonymous callers,
+keyed by the normalized query parameters and the catalog version the
+response was built from. The version is read on every request (one
+primary-key lookup instead of the full query), so a response cached before
+a committed write is never served after it. A background LISTEN on
+catalog_changed (sent by the catalog_versions trigger) evicts superseded
+entries as soon as the write commits instead of leaving them to TTL/LRU.
+'''
+
+import functools
+import os
+import select
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from shared.catalog import get_catalog_version
+from shared.db import get_db_connection, release_db_connection
+from shared.http import etag_matches, get_header
+
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '512'))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', '60'))
+RESPONSE_CACHE_MAX_BODY = int(os.environ.get('RESPONSE_CACHE_MAX_BODY', str(256 * 1024)))
+NOTIFY_CHANNEL = 'catalog_changed'
+
+class ResponseCache:
+    '''
+    TTL + LRU mapping (catalog, version, params) -> response dict, with
+    hit/miss/eviction counters.
+    '''
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Tuple[str, int, Hashable], Tuple[Dict[str, Any], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Counter = Counter()
+    
+    def get(self, catalog: str, version: int, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get((catalog, version, key))
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            response, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[(catalog, version, key)]
+                self.counters['expirations'] += 1
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end((catalog, version, key))
+            self.counters['hits'] += 1
+            return response
+    
+    def set(self, catalog: str, version: int, key: Hashable, response: Dict[str, Any]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[(catalog, version, key)] = (response, time.monotonic() + self.ttl)
+            self._entries.move_to_end((catalog, version, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+    
+    def invalidate(self, catalog: str, version: int) -> None:
+        '''Drops entries of the catalog built from versions older than version.'''
+        with self._lock:
+            stale = [entry_key for entry_key in self._entries if entry_key[0] == catalog and entry_key[1] < version]
+            for entry_key in stale:
+                del self._entries[entry_key]
+            self.counters['invalidations'] += len(stale)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), **{name: self.counters[name] for name in
+                    ('hits', 'misses', 'evictions', 'expirations', 'invalidations')}}
+
+_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+def response_cache_stats() -> Dict[str, int]:
+    return _cache.stats()
+
+def apply_notification(payload: str) -> None:
+    catalog, _, version = payload.rpartition(':')
+    if catalog and version.isdigit():
+        _cache.invalidate(catalog, int(version))
+
+def listen_for_changes(dsn: str) -> None:
+    '''
+    Runs forever on a dedicated autocommit connection. Notifications missed
+    while reconnecting only delay eviction, since every lookup checks the
+    current version anyway.
+    '''
+    delay = 1.0
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(dsn)
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            delay = 1.0
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    apply_notification(conn.notifies.pop(0).payload)
+        except (psycopg2.Error, OSError):
+            if conn is not None:
+                conn.close()
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+_listener: Optional[threading.Thread] = None
+_listener_lock = threading.Lock()
+
+def ensure_listener() -> None:
+    global _listener
+    if _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is None:
+            _listener = threading.Thread(
+                target=listen_for_changes, args=(os.environ['DATABASE_URL'],),
+                name='catalog-listener', daemon=True
+            )
+            _listener.start()
+
+def read_catalog_version(catalog: str) -> int:
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            return get_catalog_version(cur, catalog)
+    finally:
+        release_db_connection(conn)
+
+def cached_get(catalog: str, uncacheable: Iterable[str] = ()) -> Callable:
+    '''
+    Caches 200 responses of anonymous GETs (no X-Auth-Token) of a function
+    handler. Requests carrying any parameter in uncacheable bypass the cache,
+    and responses marked Cache-Control: no-store are not stored.
+    Place it under @compressed so that bodies are stored uncompressed.
+    '''
+    uncacheable = tuple(uncacheable)
+    
+    def decorator(handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+        @functools.wraps(handler)
+        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            params = event.get('queryStringParameters') or {}
+            headers = event.get('headers')
+            if (event.get('httpMethod') != 'GET' or get_header(headers, 'X-Auth-Token')
+                    or any(params.get(name) for name in uncacheable)):
+                return handler(event, context)
+            
+            ensure_listener()
+            version = read_catalog_version(catalog)
+            key = tuple(sorted((name, value) for name, value in params.items() if value not in (None, '')))
+            
+            cached = _cache.get(catalog, version, key)
+            if cached is not None:
+                response_headers = {**cached['headers'], 'X-Cache': 'HIT'}
+                etag = response_headers.get('ETag')
+                if etag and etag_matches(get_header(headers, 'If-None-Match'), etag):
+                    response_headers.pop('Content-Type', None)
+                    return {'statusCode': 304, 'headers': response_headers, 'body': '', 'isBase64Encoded': False}
+                return {**cached, 'headers': response_headers}
+            
+            response = handler(event, context)
+            body = response.get('body')
+            if (response.get('statusCode') == 200 and not response.get('isBase64Encoded')
+                    and isinstance(body, str) and len(body) <= RESPONSE_CACHE_MAX_BODY
+                    and 'no-store' not in (response.get('headers') or {}).get('Cache-Control', '')):
+                _cache.set(catalog, version, key, response)
+            return {**response, 'headers': {**(response.get('headers') or {}), 'X-Cache': 'MISS'}}
+        return wrapper
+    return decorator
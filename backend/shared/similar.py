@@ -0,0 +1,154 @@
+'''
+Similar recipes by ingredient-set Jaccard similarity, estimated with MinHash.
+Signatures (64 x int32, table recipe_signatures) are computed in SQL from
+minhash_seeds whenever a write changes a recipe's ingredients. Every process
+keeps them in one flat int array plus LSH buckets (16 bands of 4 rows), so a
+query only compares against recipes that share a whole band. The index is
+loaded on first use and then refreshed incrementally: only the signatures
+of recipes whose ingredients changed since the last refresh are re-read
+(see shared.catalog), and a recipe without a signature row is removed.
+Refreshes change the index in place, so lookups and refreshes take the
+index's own lock; the database read of a refresh happens outside it.
+'''
+
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.catalog import changed_recipe_ids, current_snapshot, get_catalog_version
+
+SIGNATURE_SIZE = 64
+LSH_BANDS = 16
+LSH_ROWS = SIGNATURE_SIZE // LSH_BANDS
+
+class SimilarityIndex:
+    def __init__(self):
+        self.signatures = array('i')
+        self.recipe_ids = array('i')
+        self.slots: Dict[int, int] = {}
+        self.free: List[int] = []
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(LSH_BANDS)]
+        self.version: Optional[int] = None
+        self.snapshot: Optional[str] = None
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.slots)
+    
+    def _band_keys(self, slot: int) -> List[int]:
+        start = slot * SIGNATURE_SIZE
+        return [hash(tuple(self.signatures[start + band * LSH_ROWS:start + (band + 1) * LSH_ROWS]))
+                for band in range(LSH_BANDS)]
+    
+    def remove(self, recipe_id: int) -> None:
+        slot = self.slots.pop(recipe_id, None)
+        if slot is None:
+            return
+        for buckets, key in zip(self.buckets, self._band_keys(slot)):
+            bucket = buckets[key]
+            bucket.remove(slot)
+            if not bucket:
+                del buckets[key]
+        self.recipe_ids[slot] = 0
+        self.free.append(slot)
+    
+    def add(self, recipe_id: int, signature: List[int]) -> None:
+        self.remove(recipe_id)
+        if self.free:
+            slot = self.free.pop()
+            self.signatures[slot * SIGNATURE_SIZE:(slot + 1) * SIGNATURE_SIZE] = array('i', signature)
+            self.recipe_ids[slot] = recipe_id
+        else:
+            slot = len(self.recipe_ids)
+            self.signatures.extend(signature)
+            self.recipe_ids.append(recipe_id)
+        self.slots[recipe_id] = slot
+        for buckets, key in zip(self.buckets, self._band_keys(slot)):
+            buckets.setdefault(key, []).append(slot)
+    
+    def apply(self, rows: List[Dict[str, Any]]) -> None:
+        '''Adds or replaces each row's signature; a NULL signature removes the recipe.'''
+        with self.lock:
+            for row in rows:
+                if row['signature'] is None:
+                    self.remove(row['recipe_id'])
+                else:
+                    self.add(row['recipe_id'], row['signature'])
+    
+    def similar(self, recipe_id: int, limit: int) -> List[Tuple[int, float]]:
+        '''(recipe_id, estimated Jaccard similarity), most similar first.'''
+        with self.lock:
+            slot = self.slots.get(recipe_id)
+            if slot is None:
+                return []
+            candidates = set()
+            for buckets, key in zip(self.buckets, self._band_keys(slot)):
+                candidates.update(buckets[key])
+            candidates.discard(slot)
+            
+            signatures = self.signatures
+            start = slot * SIGNATURE_SIZE
+            own = signatures[start:start + SIGNATURE_SIZE]
+            scored = []
+            for other in candidates:
+                other_start = other * SIGNATURE_SIZE
+                same = sum(a == b for a, b in zip(own, signatures[other_start:other_start + SIGNATURE_SIZE]))
+                scored.append((-same, self.recipe_ids[other]))
+        scored.sort()
+        return [(other_id, -negative_same / SIGNATURE_SIZE) for negative_same, other_id in scored[:limit]]
+
+_index = SimilarityIndex()
+_index_lock = threading.Lock()
+
+def refresh_recipe_signatures(cur, recipe_ids: List[int]) -> None:
+    '''
+    Recomputes the MinHash signature of the given recipes from their current
+    recipe_ingredients rows; a recipe left without ingredients gets NULL.
+    '''
+    if not recipe_ids:
+        return
+    cur.execute("""
+        INSERT INTO recipe_signatures (recipe_id, signature, updated_at)
+        SELECT rid.id, sig.signature, CURRENT_TIMESTAMP
+        FROM (SELECT DISTINCT id FROM unnest(%s::int[]) AS u(id)) rid
+        JOIN recipes r ON r.id = rid.id
+        LEFT JOIN LATERAL (
+            SELECT array_agg(m.h ORDER BY m.k) AS signature
+            FROM (
+                SELECT s.k, MIN((s.a * x.ingredient_id + s.b) %% 2147483647)::int AS h
+                FROM recipe_ingredients x
+                CROSS JOIN minhash_seeds s
+                WHERE x.recipe_id = rid.id AND x.ingredient_id IS NOT NULL
+                GROUP BY s.k
+            ) m
+        ) sig ON true
+        ON CONFLICT (recipe_id) DO UPDATE
+        SET signature = EXCLUDED.signature, updated_at = EXCLUDED.updated_at
+        WHERE recipe_signatures.signature IS DISTINCT FROM EXCLUDED.signature
+    """, ([int(recipe_id) for recipe_id in recipe_ids],))
+
+def get_similarity_index(cur) -> SimilarityIndex:
+    version = get_catalog_version(cur, 'recipe_ingredients')
+    if _index.version == version:
+        return _index
+    with _index_lock:
+        if _index.version == version:
+            return _index
+        
+        # taken before the reads below, so a change they miss is re-read next time
+        snapshot = current_snapshot(cur)
+        
+        if _index.snapshot is None:
+            cur.execute("SELECT recipe_id, signature FROM recipe_signatures WHERE signature IS NOT NULL")
+        else:
+            cur.execute("""
+                SELECT rid.id AS recipe_id, s.signature
+                FROM unnest(%s::int[]) AS rid(id)
+                LEFT JOIN recipe_signatures s ON s.recipe_id = rid.id
+            """, (changed_recipe_ids(cur, _index.snapshot),))
+        
+        _index.apply(cur.fetchall())
+        
+        _index.version = version
+        _index.snapshot = snapshot
+        return _index
@@ -0,0 +1,51 @@
+'''
+Refresh of the recipe_trending materialized view (V0011), which ranks
+recipes by recency, favorites and meal-plan usage. The list reads it with
+sort=trending, so scoring is never done per request. A refresh bumps the
+'recipes' catalog version because list pages sorted by trending change.
+Run locally or from a scheduler, from the backend directory:
+    DATABASE_URL=postgresql://... python -m shared.trending [every_seconds]
+'''
+
+import os
+import sys
+import time
+
+import psycopg2
+
+def refresh_trending(conn) -> bool:
+    '''
+    Rebuilds the ranking without blocking readers. Returns False when
+    another refresh holds the lock, so overlapping runs do no double work.
+    '''
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_xact_lock(hashtext('recipe_trending'))")
+        if not cur.fetchone()[0]:
+            conn.rollback()
+            return False
+        cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY recipe_trending")
+        cur.execute("""
+            UPDATE catalog_versions
+            SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE name = 'recipes'
+        """)
+    conn.commit()
+    return True
+
+def main() -> None:
+    every = float(sys.argv[1]) if len(sys.argv) > 1 else 0
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    try:
+        while True:
+            started = time.monotonic()
+            refreshed = refresh_trending(conn)
+            elapsed = time.monotonic() - started
+            print(f"recipe_trending {'refreshed' if refreshed else 'skipped, refresh in progress'} in {elapsed * 1000:.0f} ms", flush=True)
+            if not every:
+                break
+            time.sleep(max(every - elapsed, 0))
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+-- Полнотекстовый поиск по рецептам
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Поисковый вектор: русская морфология и конфигурация simple (латиница, бренды, опечатки в окончаниях)
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('russian', coalesce(instructions, '')), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_recipes_search_vector ON recipes USING GIN (search_vector);
+
+-- Триграммный индекс для поиска с опечатками по названию
+CREATE INDEX IF NOT EXISTS idx_recipes_title_trgm ON recipes USING GIN (lower(title) gin_trgm_ops);
@@ -0,0 +1,10 @@
+-- Индексы для постраничной выборки по ключу (keyset pagination)
+
+-- Лента рецептов: ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_recipes_created_at_id ON recipes(created_at DESC, id DESC);
+
+-- Лента рецептов с фильтром по категории
+CREATE INDEX IF NOT EXISTS idx_recipes_category_created_at_id ON recipes(category_id, created_at DESC, id DESC);
+
+-- Справочник ингредиентов: ORDER BY name, id
+CREATE INDEX IF NOT EXISTS idx_ingredients_name_id ON ingredients(name, id);
@@ -0,0 +1,27 @@
+-- Приводим meal_plans к коду планировщика и фронтенду: столбец meal_date
+-- и не более одного рецепта на (пользователь, день, приём пищи) для ON CONFLICT
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'meal_plans' AND column_name = 'plan_date'
+    ) THEN
+        ALTER TABLE meal_plans RENAME COLUMN plan_date TO meal_date;
+    END IF;
+END $$;
+
+-- Из повторяющихся записей одного слота остаётся последняя
+DELETE FROM meal_plans a
+USING meal_plans b
+WHERE a.user_id = b.user_id AND a.meal_date = b.meal_date AND a.meal_type = b.meal_type AND a.id < b.id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_meal_plans_user_slot') THEN
+        ALTER TABLE meal_plans ADD CONSTRAINT uq_meal_plans_user_slot UNIQUE (user_id, meal_date, meal_type);
+    END IF;
+END $$;
+
+-- Уникальный индекс начинается с (user_id, meal_date) и заменяет прежний
+DROP INDEX IF EXISTS idx_meal_plans_user_date;
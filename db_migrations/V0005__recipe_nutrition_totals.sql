@@ -0,0 +1,32 @@
+-- Предрассчитанная калорийность рецептов
+
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS total_calories DECIMAL(10,2);
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS calories_per_serving DECIMAL(8,1);
+
+-- Калорийность одной строки состава рецепта: одна формула для обработчиков
+-- (shared/nutrition.py) и пересчётов в SQL.
+-- Граммы считаются только для г/кг/мл/л, штучные и прочие единицы дают NULL.
+CREATE OR REPLACE FUNCTION recipe_ingredient_calories(amount NUMERIC, unit TEXT, calories_per_100g NUMERIC)
+RETURNS NUMERIC AS $$
+    SELECT amount * CASE lower(unit)
+        WHEN 'г' THEN 1 WHEN 'кг' THEN 1000
+        WHEN 'мл' THEN 1 WHEN 'л' THEN 1000
+    END * calories_per_100g / 100
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Заполнение для существующих рецептов
+UPDATE recipes r
+SET total_calories = n.total_calories,
+    calories_per_serving = ROUND(n.total_calories / NULLIF(r.servings, 0), 1)
+FROM (
+    SELECT x.recipe_id,
+           SUM(recipe_ingredient_calories(x.amount, x.unit, i.calories_per_100g)) AS total_calories
+    FROM recipe_ingredients x
+    JOIN ingredients i ON i.id = x.ingredient_id
+    GROUP BY x.recipe_id
+) n
+WHERE r.id = n.recipe_id;
+
+-- Фильтрация и сортировка по калорийности порции
+CREATE INDEX IF NOT EXISTS idx_recipes_calories_per_serving ON recipes(calories_per_serving, id)
+    WHERE calories_per_serving IS NOT NULL;
@@ -0,0 +1,35 @@
+-- Счётчики версий каталога для условных GET-запросов (ETag / If-None-Match)
+
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO catalog_versions (name) VALUES ('recipes'), ('ingredients')
+ON CONFLICT (name) DO NOTHING;
+
+-- Увеличивает версию раздела каталога, имя раздела передаётся аргументом триггера
+CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE catalog_versions
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE name = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_recipes_catalog_version ON recipes;
+CREATE TRIGGER trg_recipes_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON recipes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('recipes');
+
+DROP TRIGGER IF EXISTS trg_recipe_ingredients_catalog_version ON recipe_ingredients;
+CREATE TRIGGER trg_recipe_ingredients_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON recipe_ingredients
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('recipes');
+
+DROP TRIGGER IF EXISTS trg_ingredients_catalog_version ON ingredients;
+CREATE TRIGGER trg_ingredients_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON ingredients
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('ingredients');
@@ -0,0 +1,58 @@
+-- Инкрементальная синхронизация каталога: updated_at и журнал удалений
+
+ALTER TABLE ingredients ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+UPDATE ingredients SET updated_at = created_at;
+
+-- Обновляет updated_at при фактическом изменении строки. Столбцы из аргументов триггера
+-- не сравниваются: генерируемые столбцы в NEW триггера BEFORE ещё не вычислены (NULL),
+-- поэтому условие WHEN (OLD.* IS DISTINCT FROM NEW.*) для recipes недопустимо
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    IF (to_jsonb(NEW) - TG_ARGV) IS DISTINCT FROM (to_jsonb(OLD) - TG_ARGV) THEN
+        NEW.updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_recipes_touch_updated_at ON recipes;
+CREATE TRIGGER trg_recipes_touch_updated_at
+    BEFORE UPDATE ON recipes
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at('search_vector', 'updated_at');
+
+DROP TRIGGER IF EXISTS trg_ingredients_touch_updated_at ON ingredients;
+CREATE TRIGGER trg_ingredients_touch_updated_at
+    BEFORE UPDATE ON ingredients
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at('updated_at');
+
+CREATE INDEX IF NOT EXISTS idx_recipes_updated_at_id ON recipes(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_ingredients_updated_at_id ON ingredients(updated_at, id);
+
+-- Журнал удалений (tombstones) для клиентов, синхронизирующих каталог
+CREATE TABLE IF NOT EXISTS deleted_records (
+    id BIGSERIAL PRIMARY KEY,
+    entity VARCHAR(50) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Постраничная выдача журнала по ключу (deleted_at, entity_id)
+CREATE INDEX IF NOT EXISTS idx_deleted_records_entity_deleted_at_id ON deleted_records(entity, deleted_at, entity_id);
+
+-- Записывает удалённую строку в журнал, имя сущности передаётся аргументом триггера
+CREATE OR REPLACE FUNCTION log_deleted_record() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_records (entity, entity_id) VALUES (TG_ARGV[0], OLD.id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_recipes_log_deleted ON recipes;
+CREATE TRIGGER trg_recipes_log_deleted
+    AFTER DELETE ON recipes
+    FOR EACH ROW EXECUTE FUNCTION log_deleted_record('recipes');
+
+DROP TRIGGER IF EXISTS trg_ingredients_log_deleted ON ingredients;
+CREATE TRIGGER trg_ingredients_log_deleted
+    AFTER DELETE ON ingredients
+    FOR EACH ROW EXECUTE FUNCTION log_deleted_record('ingredients');
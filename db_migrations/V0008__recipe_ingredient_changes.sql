@@ -0,0 +1,69 @@
+-- Инкрементальное обновление индексов по составу рецептов
+
+-- Отдельная версия для состава рецептов: индекс "что приготовить" обновляется
+-- только при изменении recipe_ingredients, а не при каждой правке рецепта
+INSERT INTO catalog_versions (name) VALUES ('recipe_ingredients')
+ON CONFLICT (name) DO NOTHING;
+
+DROP TRIGGER IF EXISTS trg_recipe_ingredients_composition_version ON recipe_ingredients;
+CREATE TRIGGER trg_recipe_ingredients_composition_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON recipe_ingredients
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('recipe_ingredients');
+
+-- Журнал изменений состава рецептов для индексов в памяти процессов:
+-- по нему индекс перечитывает только изменённые рецепты.
+-- txid — транзакция последнего изменения. В отличие от updated_at (время начала
+-- транзакции) по снимку pg_current_snapshot() видно, какие транзакции зафиксированы
+-- после него, поэтому долгая транзакция не проскочит мимо обновления индекса
+CREATE TABLE IF NOT EXISTS recipe_ingredient_changes (
+    recipe_id INTEGER PRIMARY KEY,
+    txid xid8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+CREATE INDEX IF NOT EXISTS idx_recipe_ingredient_changes_txid ON recipe_ingredient_changes(txid);
+
+-- Отмечает рецепты, у которых изменился набор ингредиентов. Изменение только
+-- количества или единицы не записывается: индексы хранят лишь сам набор.
+-- Таблицы переходов допускаются только у триггера на одно событие, поэтому три триггера
+CREATE OR REPLACE FUNCTION log_recipe_ingredient_changes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO recipe_ingredient_changes (recipe_id)
+        SELECT DISTINCT recipe_id FROM new_rows WHERE recipe_id IS NOT NULL
+        ON CONFLICT (recipe_id) DO UPDATE SET txid = EXCLUDED.txid;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO recipe_ingredient_changes (recipe_id)
+        SELECT DISTINCT recipe_id FROM old_rows WHERE recipe_id IS NOT NULL
+        ON CONFLICT (recipe_id) DO UPDATE SET txid = EXCLUDED.txid;
+    ELSE
+        INSERT INTO recipe_ingredient_changes (recipe_id)
+        SELECT o.recipe_id FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE (o.recipe_id, o.ingredient_id) IS DISTINCT FROM (n.recipe_id, n.ingredient_id)
+          AND o.recipe_id IS NOT NULL
+        UNION
+        SELECT n.recipe_id FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE (o.recipe_id, o.ingredient_id) IS DISTINCT FROM (n.recipe_id, n.ingredient_id)
+          AND n.recipe_id IS NOT NULL
+        ON CONFLICT (recipe_id) DO UPDATE SET txid = EXCLUDED.txid;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_recipe_ingredients_log_insert ON recipe_ingredients;
+CREATE TRIGGER trg_recipe_ingredients_log_insert
+    AFTER INSERT ON recipe_ingredients
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_recipe_ingredient_changes();
+
+DROP TRIGGER IF EXISTS trg_recipe_ingredients_log_update ON recipe_ingredients;
+CREATE TRIGGER trg_recipe_ingredients_log_update
+    AFTER UPDATE ON recipe_ingredients
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_recipe_ingredient_changes();
+
+DROP TRIGGER IF EXISTS trg_recipe_ingredients_log_delete ON recipe_ingredients;
+CREATE TRIGGER trg_recipe_ingredients_log_delete
+    AFTER DELETE ON recipe_ingredients
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_recipe_ingredient_changes();
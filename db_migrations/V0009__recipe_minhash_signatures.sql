@@ -0,0 +1,35 @@
+-- MinHash-сигнатуры наборов ингредиентов для поиска похожих рецептов
+
+-- Коэффициенты хеш-функций h_k(x) = (a * x + b) mod (2^31 - 1), по одной на позицию сигнатуры
+CREATE TABLE IF NOT EXISTS minhash_seeds (
+    k SMALLINT PRIMARY KEY,
+    a BIGINT NOT NULL,
+    b BIGINT NOT NULL
+);
+
+INSERT INTO minhash_seeds (k, a, b)
+SELECT k,
+       ('x' || substr(md5('minhash-a-' || k), 1, 8))::bit(32)::bigint % 2147483646 + 1,
+       ('x' || substr(md5('minhash-b-' || k), 1, 8))::bit(32)::bigint % 2147483647
+FROM generate_series(1, 64) AS k
+ON CONFLICT (k) DO NOTHING;
+
+-- signature = NULL означает, что у рецепта больше нет ингредиентов
+CREATE TABLE IF NOT EXISTS recipe_signatures (
+    recipe_id INTEGER PRIMARY KEY REFERENCES recipes(id) ON DELETE CASCADE,
+    signature INTEGER[],
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Заполнение сигнатур для существующих рецептов
+INSERT INTO recipe_signatures (recipe_id, signature)
+SELECT m.recipe_id, array_agg(m.h ORDER BY m.k)
+FROM (
+    SELECT x.recipe_id, s.k, MIN((s.a * x.ingredient_id + s.b) % 2147483647)::int AS h
+    FROM recipe_ingredients x
+    CROSS JOIN minhash_seeds s
+    WHERE x.recipe_id IS NOT NULL AND x.ingredient_id IS NOT NULL
+    GROUP BY x.recipe_id, s.k
+) m
+GROUP BY m.recipe_id
+ON CONFLICT (recipe_id) DO NOTHING;
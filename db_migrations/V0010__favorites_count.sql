@@ -0,0 +1,58 @@
+-- Денормализованный счётчик избранного и сортировка по популярности
+
+ALTER TABLE recipes ADD COLUMN IF NOT EXISTS favorites_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE recipes r
+SET favorites_count = f.cnt
+FROM (
+    SELECT recipe_id, COUNT(*) AS cnt
+    FROM favorites
+    WHERE recipe_id IS NOT NULL
+    GROUP BY recipe_id
+) f
+WHERE r.id = f.recipe_id;
+
+-- Keyset-пагинация сортировки popular: ORDER BY favorites_count DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_recipes_favorites_count_id ON recipes(favorites_count DESC, id DESC);
+
+-- Быстрая проверка "в избранном ли" для пачки рецептов пользователя: покрывается UNIQUE(user_id, recipe_id)
+
+-- Изменение одного лишь счётчика не считается изменением рецепта для синхронизации
+DROP TRIGGER IF EXISTS trg_recipes_touch_updated_at ON recipes;
+CREATE TRIGGER trg_recipes_touch_updated_at
+    BEFORE UPDATE ON recipes
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at('search_vector', 'updated_at', 'favorites_count');
+
+-- Добавление в избранное меняет только recipes.favorites_count и не должно
+-- увеличивать версию каталога 'recipes': иначе каждый лайк блокирует одну строку
+-- catalog_versions и сбрасывает ETag всех списков.
+-- Ответы с favorites_count отдаются без ETag и не кэшируются (Cache-Control: no-store).
+
+-- Увеличивает версию раздела TG_ARGV[0], только если UPDATE изменил в какой-либо
+-- строке что-то кроме перечисленных в остальных аргументах столбцов
+CREATE OR REPLACE FUNCTION bump_catalog_version_on_change() RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (
+        SELECT to_jsonb(n) - TG_ARGV[1:] FROM new_rows n
+        EXCEPT
+        SELECT to_jsonb(o) - TG_ARGV[1:] FROM old_rows o
+    ) THEN
+        UPDATE catalog_versions
+        SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE name = TG_ARGV[0];
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Таблицы переходов допускаются только у триггера на одно событие, поэтому UPDATE отдельно
+DROP TRIGGER IF EXISTS trg_recipes_catalog_version ON recipes;
+CREATE TRIGGER trg_recipes_catalog_version
+    AFTER INSERT OR DELETE OR TRUNCATE ON recipes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('recipes');
+
+DROP TRIGGER IF EXISTS trg_recipes_catalog_version_update ON recipes;
+CREATE TRIGGER trg_recipes_catalog_version_update
+    AFTER UPDATE ON recipes
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version_on_change('recipes', 'favorites_count');
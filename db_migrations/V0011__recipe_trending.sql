@@ -0,0 +1,33 @@
+-- Предрасчитанный рейтинг "в тренде": свежесть рецепта, избранное и использование в планах питания.
+-- Обновляется периодически (python -m shared.trending), а не считается на каждый запрос.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS recipe_trending AS
+SELECT r.id AS recipe_id,
+       ((1 + 0.5 * r.favorites_count
+           + 2 * COALESCE(f.recent_favorites, 0)
+           + 3 * COALESCE(m.recent_meal_plans, 0))
+        / power(EXTRACT(EPOCH FROM (now() - COALESCE(r.created_at, now()))) / 3600 + 2, 1.5))::float8 AS score,
+       now()::timestamp AS computed_at
+FROM recipes r
+LEFT JOIN (
+    SELECT recipe_id, COUNT(*) AS recent_favorites
+    FROM favorites
+    WHERE created_at > now() - interval '7 days'
+    GROUP BY recipe_id
+) f ON f.recipe_id = r.id
+LEFT JOIN (
+    SELECT recipe_id, COUNT(*) AS recent_meal_plans
+    FROM meal_plans
+    WHERE created_at > now() - interval '14 days'
+    GROUP BY recipe_id
+) m ON m.recipe_id = r.id;
+
+-- Уникальный индекс нужен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_recipe_trending_recipe_id ON recipe_trending(recipe_id);
+
+-- Keyset-пагинация сортировки trending: ORDER BY score DESC, recipe_id DESC
+CREATE INDEX IF NOT EXISTS idx_recipe_trending_score ON recipe_trending(score DESC, recipe_id DESC);
+
+-- Окна "недавних" событий для пересчёта
+CREATE INDEX IF NOT EXISTS idx_favorites_created_at ON favorites(created_at);
+CREATE INDEX IF NOT EXISTS idx_meal_plans_created_at ON meal_plans(created_at);
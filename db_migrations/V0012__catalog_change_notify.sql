@@ -0,0 +1,16 @@
+-- Оповещение об изменении каталога (LISTEN catalog_changed) для сброса кешей ответов в тёплых инстансах.
+-- Триггер стоит на самой таблице версий, поэтому срабатывает при любом увеличении версии,
+-- в том числе из триггеров записи и при пересчёте рейтинга trending. Уведомление уходит при COMMIT.
+
+CREATE OR REPLACE FUNCTION notify_catalog_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('catalog_changed', NEW.name || ':' || NEW.version);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_catalog_versions_notify ON catalog_versions;
+CREATE TRIGGER trg_catalog_versions_notify
+    AFTER UPDATE OF version ON catalog_versions
+    FOR EACH ROW WHEN (OLD.version IS DISTINCT FROM NEW.version)
+    EXECUTE FUNCTION notify_catalog_changed();
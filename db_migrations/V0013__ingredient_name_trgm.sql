@@ -0,0 +1,12 @@
+-- Триграммный индекс для поиска ингредиентов по подстроке (GET /ingredients?search=, а также
+-- добор результатов автодополнения). Нормализация совпадает с normalize_name в
+-- shared/autocomplete.py: регистр и ё/е не различаются, пробелы схлопываются.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION normalize_ingredient_name(name TEXT) RETURNS TEXT AS $$
+    SELECT btrim(regexp_replace(replace(lower(name), 'ё', 'е'), '\s+', ' ', 'g'))
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE INDEX IF NOT EXISTS idx_ingredients_name_trgm
+    ON ingredients USING GIN (normalize_ingredient_name(name) gin_trgm_ops);
@@ -0,0 +1,12 @@
+-- Индексы для фильтров и фасетов ленты рецептов (сложность, время, порции, ингредиенты)
+
+-- Подсчёт фасетов: категория, сложность и время приготовления читаются из индекса (index-only scan),
+-- порции и калорийность включены, чтобы фильтры по ним не требовали обращения к таблице
+CREATE INDEX IF NOT EXISTS idx_recipes_facets
+    ON recipes(category_id, difficulty, cooking_time) INCLUDE (servings, calories_per_serving);
+
+-- Лента рецептов с фильтром по сложности
+CREATE INDEX IF NOT EXISTS idx_recipes_difficulty_created_at_id ON recipes(difficulty, created_at DESC, id DESC);
+
+-- Фильтр «с ингредиентами»: рецепты по ингредиенту (UNIQUE(recipe_id, ingredient_id) покрывает исключение)
+CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_ingredient_recipe ON recipe_ingredients(ingredient_id, recipe_id);
@@ -11,20 +11,36 @@ export interface User {
   name: string
 }
 
+// List responses carry the summary fields only unless `fields` asks for more
 export interface Recipe {
   id: number
   user_id?: number
   title: string
-  description: string
+  description?: string
   image_url: string
   cooking_time: number
   servings: number
   difficulty: string
   category_id?: number
-  instructions: string
+  instructions?: string
   created_at?: string
   updated_at?: string
   author_name?: string
+  ingredients?: RecipeIngredient[]
+  calories_per_serving?: string | null
+  matched_ingredients?: number
+  missing_ingredients?: number
+  similarity?: number
+  // not in the summary: ask for it in `fields`; such responses are never cached
+  favorites_count?: number
+}
+
+export interface RecipeIngredient {
+  ingredient_id: number
+  name: string
+  amount: number
+  unit: string
+  calories_per_100g?: number | null
 }
 
 export interface Ingredient {
@@ -33,6 +49,26 @@ export interface Ingredient {
   unit: string
   calories_per_100g?: string
   created_at?: string
+  updated_at?: string
+}
+
+export interface SyncChanges<T> {
+  items: T[]
+  deleted: number[]
+  watermark: string
+  has_more: boolean
+}
+
+// Counts for the current filter; each facet ignores its own filter so sibling values keep their counts
+export interface FacetCount<T> {
+  value: T
+  count: number
+}
+
+export interface RecipeFacets {
+  category: FacetCount<number | null>[]
+  difficulty: FacetCount<string>[]
+  cooking_time: FacetCount<'up_to_15' | 'up_to_30' | 'up_to_60' | 'over_60'>[]
 }
 
 export interface MealPlan {
@@ -48,6 +84,20 @@ export interface MealPlan {
   created_at?: string
 }
 
+export interface ShoppingList {
+  start_date: string
+  end_date: string
+  items: { ingredient_id: number; name: string; amount: number; unit: string }[]
+}
+
+export interface MealPlanBatchResult {
+  op: 'upsert' | 'delete'
+  index: number
+  status: 'upserted' | 'deleted' | 'not_found' | 'superseded' | 'invalid'
+  error?: string
+  meal_plan?: MealPlan
+}
+
 class APIClient {
   private token: string | null = null
 
@@ -130,7 +180,22 @@ class APIClient {
     this.setToken(null)
   }
 
-  async getRecipes(params?: { category?: string; search?: string; id?: string }): Promise<Recipe[]> {
+  async getRecipes(params?: {
+    category?: string
+    search?: string
+    id?: string
+    sort?: 'newest' | 'relevance' | 'calories' | 'popular' | 'trending'
+    min_calories?: string
+    max_calories?: string
+    difficulty?: string
+    min_time?: string
+    max_time?: string
+    min_servings?: string
+    max_servings?: string
+    with_ingredients?: string
+    without_ingredients?: string
+    fields?: string
+  }): Promise<Recipe[]> {
     const url = new URL(API_URLS.recipes)
     if (params) {
       Object.entries(params).forEach(([key, value]) => {
@@ -140,12 +205,68 @@ class APIClient {
     return this.request(url.toString())
   }
 
+  async getRecipesWithFacets(params?: Parameters<APIClient['getRecipes']>[0]): Promise<{ recipes: Recipe[]; facets: RecipeFacets }> {
+    const url = new URL(API_URLS.recipes)
+    if (params) {
+      Object.entries(params).forEach(([key, value]) => {
+        if (value) url.searchParams.append(key, value)
+      })
+    }
+    url.searchParams.append('facets', 'true')
+    return this.request(url.toString())
+  }
+
   async getRecipe(id: number): Promise<Recipe> {
     const url = new URL(API_URLS.recipes)
     url.searchParams.append('id', id.toString())
     return this.request(url.toString())
   }
 
+  async getRecipesByIds(ids: number[], fields?: string): Promise<{ recipes: Recipe[]; missing: number[] }> {
+    const url = new URL(API_URLS.recipes)
+    url.searchParams.append('ids', ids.join(','))
+    if (fields) url.searchParams.append('fields', fields)
+    return this.request(url.toString())
+  }
+
+  async getRecipesFromPantry(ingredientIds: number[], params?: { max_missing?: number; limit?: number; fields?: string }): Promise<Recipe[]> {
+    const url = new URL(API_URLS.recipes)
+    url.searchParams.append('pantry', ingredientIds.join(','))
+    if (params) {
+      Object.entries(params).forEach(([key, value]) => {
+        if (value !== undefined) url.searchParams.append(key, value.toString())
+      })
+    }
+    return this.request(url.toString())
+  }
+
+  async getSimilarRecipes(id: number, limit?: number): Promise<Recipe[]> {
+    const url = new URL(API_URLS.recipes)
+    url.searchParams.append('similar_to', id.toString())
+    if (limit) url.searchParams.append('limit', limit.toString())
+    return this.request(url.toString())
+  }
+
+  async getRecipeChanges(updatedSince: string, limit?: number): Promise<SyncChanges<Recipe>> {
+    const url = new URL(API_URLS.recipes)
+    url.searchParams.append('updated_since', updatedSince)
+    if (limit) url.searchParams.append('limit', limit.toString())
+    return this.request(url.toString())
+  }
+
+  async getFavorited(ids: number[]): Promise<{ favorited: number[] }> {
+    const url = new URL(API_URLS.recipes)
+    url.searchParams.append('favorited', ids.join(','))
+    return this.request(url.toString())
+  }
+
+  async setFavorite(recipeId: number, favorite: boolean): Promise<{ recipe_id: number; favorited: boolean; favorites_count: number }> {
+    return this.request(API_URLS.recipes, {
+      method: 'POST',
+      body: JSON.stringify({ action: favorite ? 'favorite' : 'unfavorite', recipe_id: recipeId })
+    })
+  }
+
   async createRecipe(recipe: Partial<Recipe>): Promise<Recipe> {
     return this.request(API_URLS.recipes, {
       method: 'POST',
@@ -174,6 +295,20 @@ class APIClient {
     return this.request(url.toString())
   }
 
+  async autocompleteIngredients(prefix: string, limit?: number): Promise<Ingredient[]> {
+    const url = new URL(API_URLS.ingredients)
+    url.searchParams.append('autocomplete', prefix)
+    if (limit) url.searchParams.append('limit', limit.toString())
+    return this.request(url.toString())
+  }
+
+  async getIngredientChanges(updatedSince: string, limit?: number): Promise<SyncChanges<Ingredient>> {
+    const url = new URL(API_URLS.ingredients)
+    url.searchParams.append('updated_since', updatedSince)
+    if (limit) url.searchParams.append('limit', limit.toString())
+    return this.request(url.toString())
+  }
+
   async createIngredient(ingredient: { name: string; unit?: string; calories_per_100g?: number }): Promise<Ingredient> {
     return this.request(API_URLS.ingredients, {
       method: 'POST',
@@ -197,6 +332,15 @@ class APIClient {
     return this.request(url.toString())
   }
 
+  async getShoppingList(params: { start_date: string; end_date: string; servings?: number }): Promise<ShoppingList> {
+    const url = new URL(API_URLS.mealPlanner)
+    url.searchParams.append('action', 'shopping_list')
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== undefined) url.searchParams.append(key, value.toString())
+    })
+    return this.request(url.toString())
+  }
+
   async createMealPlan(mealPlan: { recipe_id: number; meal_date: string; meal_type: string }): Promise<MealPlan> {
     return this.request(API_URLS.mealPlanner, {
       method: 'POST',
@@ -204,6 +348,16 @@ class APIClient {
     })
   }
 
+  async batchMealPlans(batch: {
+    upsert?: { recipe_id: number; meal_date: string; meal_type: string }[]
+    delete?: { meal_date: string; meal_type: string }[]
+  }): Promise<{ results: MealPlanBatchResult[] }> {
+    return this.request(API_URLS.mealPlanner, {
+      method: 'POST',
+      body: JSON.stringify({ action: 'batch', ...batch })
+    })
+  }
+
   async deleteMealPlan(params: { id?: number; meal_date?: string; meal_type?: string }): Promise<void> {
     const url = new URL(API_URLS.mealPlanner)
     Object.entries(params).forEach(([key, value]) => {